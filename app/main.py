@@ -1,17 +1,42 @@
-import streamlit as st
-from portfolio import portfolio
-from rod import rod
-from rebalancer import rebalancer
-from next_invest import new_invests
-import robin_stocks.robinhood as r
 import os
+import sys
+
+# the shared core package lives in the repo root, one level up from this entry point
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import streamlit as st
+from core.lazy import lazy_page
+from core.prefetch import start_prefetcher
+
+
+def watchlist():
+    from core.screener import universe
+
+    return universe()
+
 
-r.login(os.getenv("RH_USERNAME"), os.getenv("RH_PASSWORD"))
+def held_tickers():
+    from core import account
+
+    return account.holdings().index
+
+
+def refresh_account(refresh=False):
+    from core import account
+
+    for endpoint in (account.holdings, account.transfers, account.portfolio_profile, account.total_dividends, account.stock_orders):
+        endpoint(refresh=refresh)
+
+
+# keeps the watchlist, holdings and account data warm in the background, started once per server
+# the Robinhood login happens on the first account call, in that thread instead of at startup
+start_prefetcher(sources=[watchlist, held_tickers], jobs=[refresh_account])
+
+# pages and their plotting and data libraries are imported the first time they are opened
 pg = st.navigation([
-    st.Page(portfolio, title="Portfolio", icon=":material/pie_chart:"),
-    st.Page(rod, title="Retire On Dividends", icon=":material/payments:"),
-    st.Page(rebalancer, title="Rebalancer", icon=":material/autorenew:"),
-    st.Page(new_invests, title="Next Investment", icon=":material/attach_money:"),
+    st.Page(lazy_page("portfolio", "portfolio"), title="Portfolio", icon=":material/pie_chart:"),
+    st.Page(lazy_page("rod", "rod"), title="Retire On Dividends", icon=":material/payments:"),
+    st.Page(lazy_page("rebalancer", "rebalancer"), title="Rebalancer", icon=":material/autorenew:"),
+    st.Page(lazy_page("next_invest", "new_invests"), title="Next Investment", icon=":material/attach_money:"),
     ])
 pg.run()
-
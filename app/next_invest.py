@@ -1,19 +1,12 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import numpy as np
+from core.bulk import panel_cache
+from core.metrics import span, tracked
+from core.screener import parse_symbols, screen, universe
 
-# Define the symbols
-symbols = [
-    "TSLY", "OARK", "APLY", "NVDY", "AMZY", "FBY", "GOOY", "CONY", "NFLY", "DISO",
-    "MSFO", "XOMO", "JPMO", "AMDY", "PYPY", "SQY", "MRNY", "AIYY", "YMAX", "YMAG",
-    "MSTY", "ULTY", "YBIT", "CRSH", "GDXY", "SNOY", "ABNY",
-]
-
+@tracked("Next Investment")
 def new_invests():
-    # Fetch ticker data
-    tickers = yf.Tickers(" ".join(symbols))
-
     if "period" not in st.session_state:
         st.session_state.period = "max"
 
@@ -29,45 +22,28 @@ def new_invests():
     if col4.button("MAX"):
         st.session_state.period = "max"
 
-    with st.spinner("Fetching data..."):
-        ticker_data = {}
-        for symbol in symbols:
-            ticker_data[symbol] = tickers.tickers[symbol].history(period=st.session_state.period)
-
-        # Initialize an empty DataFrame for the overall data
-        overall_df = pd.DataFrame()
-
-        # Loop through each symbol to calculate variance and dividend yield
-        for symbol, data in ticker_data.items():
-            std = np.std(data["Close"])
+    # the universe defaults to universe.txt (or the built in watchlist) and can be edited per session
+    if "universe" not in st.session_state:
+        st.session_state.universe = ", ".join(universe())
+    with st.expander("Symbols"):
+        symbols = parse_symbols(st.text_area("Symbols to screen", key="universe"))
 
-            div_data = ticker_data[symbol]
-            div_data = div_data[div_data["Dividends"] > 0]
-            if len(div_data) > 0:
-                latest_div = div_data.iloc[-1]
-                latest_div_amount = latest_div["Dividends"]
-                div_yield = (latest_div_amount / latest_div["Close"] * 12) * 100
-
-                # calculate the sharpe ratio
-                sharpe_ratio = (data["Close"].iloc[-1] - data["Close"].iloc[0]) / std
-
-                # calculate the average yield for the last 3 months
-                three_month_div_data = div_data.iloc[-3:]
-                average_yield = ((three_month_div_data["Dividends"].sum() / three_month_div_data["Close"].mean() * 12) * 100) / 3 
-
-                # only store the price and not the date
-                new_row = pd.DataFrame({"Symbol": [symbol], "Dividend Yield": [average_yield], "Sharpe Ratio": [sharpe_ratio], "Variance": [np.var(data["Close"])], "Close Price": [data["Close"].tolist()]})
-
-                overall_df = pd.concat([overall_df, new_row], ignore_index=True)
+    with st.spinner("Fetching data..."):
+        # the aligned panel is reused until its histories go stale, every metric is computed on it at once
+        with span("fetch panel"):
+            panel = panel_cache.panel(symbols, st.session_state.period)
+        with span("screen"):
+            overall_df = screen(panel, symbols)
 
 
 
         # Display the DataFrame with line charts
-        st.dataframe(
-            overall_df,
-            column_config={
-                "Close Price": st.column_config.LineChartColumn("Close Price"),
-            },
-            hide_index=True,
-            use_container_width=True,
-        )
+        with span("screener table"):
+            st.dataframe(
+                overall_df,
+                column_config={
+                    "Close Price": st.column_config.LineChartColumn("Close Price"),
+                },
+                hide_index=True,
+                use_container_width=True,
+            )
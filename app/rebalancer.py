@@ -2,19 +2,21 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import numpy as np
-import yfinance as yf
-from portfolio import get_portfolio_from_rh
+from core import account
+from core.charts import matrix_totals
+from core.dividends import MAX_YEARS
+from core.market import coalescer
+from core.metrics import span, tracked
+from core.rebalance import buy_orders, future_dividends, rebalance_plan
 
 
+@tracked("Rebalancer")
 def rebalancer():
     st.header("Portfolio Rebalancing Tool", divider="rainbow")
 
-    # Cache the portfolio data
-    if 'portfolio' not in st.session_state:
-        st.session_state.portfolio = get_portfolio_from_rh()
-
-    portfolio = st.session_state.portfolio
+    # the holdings come from the process wide account cache
+    with span("fetch holdings"):
+        portfolio = account.holdings()
 
     if 'rebalance' not in st.session_state:
         df = pd.DataFrame({
@@ -46,49 +48,12 @@ def rebalancer():
                 st.session_state.rebalance = current_portfolio.copy()
 
                 # print(edited_df)
-                tickers = yf.Tickers(" ".join(edited_df['Ticker'].tolist()))
-                edited_df['Price'] = st.session_state.portfolio['price'].values.astype(float)
-
-                # Calculate the current value and weight of each asset
-                edited_df['current_value'] = edited_df['Shares'] * edited_df['Price']
-                total_portfolio_value = edited_df['current_value'].sum()
-                new_total_portfolio_value = total_portfolio_value + deposit_amount
-
-                # Calculate current weights and target values
-                edited_df['current_weight'] = round(edited_df['current_value'] / total_portfolio_value * 100, 3)
-                edited_df['target_value'] = (edited_df['Target Weight %'] / 100) * new_total_portfolio_value
-                edited_df['shortfall'] = np.maximum(0, edited_df['target_value'] - edited_df['current_value'])
-
-                # Calculate the total shortfall and additional investments
-                total_shortfall = edited_df['shortfall'].sum()
-                edited_df['additional_investment'] = np.where(total_shortfall > 0, 
-                                    (edited_df['shortfall'] / total_shortfall) * deposit_amount, 
-                                    0)
-
-                # Ensure additional investment is at least $5 and divisible by $5
-                edited_df['additional_investment'] = np.where(edited_df['additional_investment'] < min_investment, 
-                                    0, 
-                                    (edited_df['additional_investment'] // min_investment) * min_investment)
-
-                # Adjust remaining funds
-                remaining_deposit = deposit_amount - edited_df['additional_investment'].sum()
-                while remaining_deposit >= min_investment:
-                    for idx in edited_df.index:
-                        if edited_df.loc[idx, 'shortfall'] > 0 and remaining_deposit >= min_investment:
-                            edited_df.loc[idx, 'additional_investment'] += min_investment
-                            remaining_deposit -= min_investment
-
-                # Calculate the future weights
-                edited_df['future_value'] = edited_df['current_value'] + edited_df['additional_investment']
-                edited_df['future_weight'] = round(edited_df['future_value'] / new_total_portfolio_value * 100, 3)
-
-                # Calculate the number of shares to be bought
-                edited_df['shares_to_buy'] = edited_df['additional_investment'] / edited_df['Price']
-
-                # Create dataframes for additional investments, current weights, future weights, and shares to buy
-                additional_investments_df = edited_df[['Ticker', 'additional_investment', 'shares_to_buy']].rename(columns={'additional_investment': 'Additional Investment', 'shares_to_buy': 'Shares to Buy'})
-                additional_investments_df = additional_investments_df[additional_investments_df['Additional Investment'] != 0]
-                additional_investments_df = additional_investments_df.sort_values(by='Additional Investment', ascending=False).reset_index(drop=True)
+                edited_df['Price'] = portfolio['price'].values.astype(float)
+
+                # Calculate the current and future values, weights and the buy orders
+                with span("rebalance plan"):
+                    edited_df = rebalance_plan(edited_df, edited_df['Price'], deposit_amount, min_investment)
+                    additional_investments_df = buy_orders(edited_df)
 
                 current_weights_df = edited_df[['Ticker', 'current_weight']].rename(columns={'current_weight': 'Current Weight'})
                 future_weights_df = edited_df[['Ticker', 'future_weight']].rename(columns={'future_weight': 'Future Weight'})
@@ -98,11 +63,11 @@ def rebalancer():
                 st.table(additional_investments_df)
 
                 col1, col2 = st.columns(2)
-                with col1:
+                with col1, span("plot weights"):
                     fig = px.pie(current_weights_df, values='Current Weight', names='Ticker', title='Current Weights')
                     st.plotly_chart(fig)            
 
-                with col2:
+                with col2, span("plot weights"):
                     fig = px.pie(future_weights_df, values='Future Weight', names='Ticker', title='Weights after Orders')
                     st.plotly_chart(fig)
 
@@ -111,59 +76,21 @@ def rebalancer():
 
                 with st.expander("Show Future Dividends"):
                     # calculate future dividends using the future weights
-                    future_dividends = pd.DataFrame({
-                        'Date': pd.Series(dtype='datetime64[ns]'),
-                        'Ticker': pd.Series(dtype='str'),
-                        'Dividends': pd.Series(dtype='float'),
-                        'Yield': pd.Series(dtype='float'),
-                    })
-
-                    for idx in edited_df.index:
-                        ticker = edited_df.loc[idx, 'Ticker']
-                        historical_divs = tickers.tickers[ticker].history(period='max').loc[tickers.tickers[ticker].history(period='max')['Dividends'] != 0]
-                        historical_divs['Yield'] = (historical_divs['Dividends'] / historical_divs['Close']) * 100
-
-                        # get averagey yield from the last 3 months. we need to use date time because some divs are paid quarterly
-                        last_3_months = historical_divs[historical_divs.index.tz_localize(None) > (pd.Timestamp.now().tz_localize(None) - pd.DateOffset(months=3))]
-                        avg_yield = last_3_months['Yield'].mean()
-                        
-                        # calculate future dividends. use concat to add the new row to the dataframe
-                        dividend_growth = tickers.tickers[ticker].dividends.pct_change().mean()
-
-                        # calculate the future dividends for the next year
-                        last_div = historical_divs.iloc[-1]['Dividends']
-                        for i in range(1, 13):
-                            future_dividends = pd.concat([future_dividends, pd.DataFrame({
-                                'Date': [pd.Timestamp.today().date() + pd.DateOffset(months=i)],
-                                'Ticker': [ticker],
-                                'Dividends': [last_div * (edited_df.loc[idx, 'Shares'] + edited_df.loc[idx, 'shares_to_buy'])],
-                                'Yield': [avg_yield]
-                            })], ignore_index=True)
-
-                            last_div = last_div * (1 + dividend_growth)
-
-
-                    future_dividends = future_dividends.sort_values(by='Date')
-                    # # Merge hover texts with the summed dividends
-                    future_dividends_sum = future_dividends[['Date', 'Dividends']].groupby('Date').sum().reset_index()
-
-
-                    # Prepare hover text
-                    hover_texts = future_dividends.groupby('Date').apply(
-                        lambda df: '<br>'.join([f"{row['Ticker']}: {row['Dividends']:.2f}" for _, row in df.iterrows()] + [f"<br>Total: {df['Dividends'].sum():.2f}"]), include_groups=False
-                    ).reset_index(name='HoverText')
-
-                    # Merge hover texts with the summed dividends
-                    future_dividends_sum = future_dividends[['Date', 'Dividends']].groupby('Date').sum().reset_index()
-                    future_dividends_sum = future_dividends_sum.merge(hover_texts, on='Date')
+                    years = st.number_input("Years to Project", min_value=1, max_value=MAX_YEARS, value=1)
+
+                    with span("project dividends"):
+                        dates, projected = future_dividends(edited_df, years)
+
+                        # per-date totals and hover breakdown straight from the projection matrix
+                        chart = matrix_totals(dates, edited_df['Ticker'], projected)
 
                     # Plotly bar chart
                     fig = go.Figure(data=[go.Bar(
-                        x=future_dividends_sum['Date'],
-                        y=future_dividends_sum['Dividends'],
-                        text=future_dividends_sum['Dividends'].round(2),
+                        x=chart['x'],
+                        y=chart['y'],
+                        text=chart['text'],
                         textposition='outside',
-                        hovertext=future_dividends_sum['HoverText'],
+                        hovertext=chart['hovertext'],
                         hoverinfo='none',
                         hovertemplate='%{hovertext}<extra></extra>',
                         marker_color='darkgreen'
@@ -179,13 +106,14 @@ def rebalancer():
                             tickangle=45,  # Rotate labels 90 degrees
                             tickfont=dict(size=10),
                             tickmode='linear',
-                            tick0=future_dividends_sum['Date'].min(),
-                            dtick=2629746000  # One day in milliseconds
+                            tick0=dates[0],
+                            dtick='M1' if years <= 2 else 'M12'  # one tick per month, or per year on long horizons
                         )
                     )
 
                     # Display the figure
-                    st.plotly_chart(fig)
+                    with span("plot dividends"):
+                        st.plotly_chart(fig)
 
 
             else:
@@ -195,5 +123,5 @@ def rebalancer():
     else:
         st.error("Please enter some data to calculate the rebalancing.")
 
-
-
+    stats = coalescer.current_stats()
+    st.caption(f"Data requests this render: {stats.upstream} upstream, {stats.hits} cached, {stats.coalesced} coalesced")
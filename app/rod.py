@@ -1,56 +1,16 @@
 import pandas as pd
 import plotly.graph_objects as go
-import yfinance as yf
 import streamlit as st
-
-def calculate_future_income(age_range, average_yield, starting_investment, monthly_investment, capital_appreciation_percent, tax_rate, expense_ratio):
-    """Calculates the monthly income from dividends in the future"""
-
-    data = pd.DataFrame()
-    data["Date"] = pd.date_range(start=pd.Timestamp.today().date(), periods=12 * (age_range[1] - age_range[0]), freq="ME")
-
-    annual_income = starting_investment * average_yield / 100
-    monthly_income = annual_income / 12
-    weekly_income = annual_income / 52
-    capital_gains_loss = (capital_appreciation_percent - (expense_ratio * 100)) / 12 
-
-    total_monthly_income = monthly_income - (monthly_income * tax_rate / 100)
-
-    # save first month of data off. then loop through the rest of the months
-    data.loc[0, "Capital"] = starting_investment
-    data.loc[0, "Total Contributions"] = starting_investment
-    data.loc[0, "Weekly Income"] = weekly_income
-    data.loc[0, "Monthly Income"] = monthly_income
-    data.loc[0, "Annual Income"] = annual_income
-    data.loc[0, "Capital Appreciation"] = capital_gains_loss * starting_investment / 100
-    data.loc[0, "Taxes"] = -1 * ((monthly_income * tax_rate) / 100)
-    data.loc[0, "Total Monthly Income"] = total_monthly_income
-
-    for i in range(1, len(data)):
-        capital = data.loc[i - 1, "Capital"] + monthly_investment + data.loc[i - 1, "Monthly Income"] + data.loc[i - 1, "Capital Appreciation"] + data.loc[i - 1, "Taxes"]
-
-        annual_income = capital * average_yield / 100
-        monthly_income = annual_income / 12
-        weekly_income = annual_income / 52
-        total_monthly_income = monthly_income - (monthly_income * tax_rate / 100)
-        capital_gains_loss = ((capital_appreciation_percent - expense_ratio * 100) / 12)
-        taxes = -1 * (monthly_income * tax_rate / 100)
-
-        data.loc[i, "Capital"] = capital
-        data.loc[i, "Total Contributions"] = data.loc[i - 1, "Total Contributions"] + monthly_investment
-        data.loc[i, "Weekly Income"] = weekly_income
-        data.loc[i, "Monthly Income"] = monthly_income
-        data.loc[i, "Annual Income"] = annual_income
-        data.loc[i, "Capital Appreciation"] = capital_gains_loss * capital / 100
-        data.loc[i, "Taxes"] = taxes
-        data.loc[i, "Total Monthly Income"] = total_monthly_income
-    
-    # round the data to 2 decimal places
-    data = data.round(2)
-
-
-    return data
-
+from core import market
+from core.charts import PAGE_SIZES, page_count, table_page
+from core.dividends import dividend_yields
+from core.metrics import span, tracked
+from core.periods import period_index
+from core.rolling import rolling
+from core.projection import TAX_BRACKETS, calculate_future_income
+from core.simulator import simulation
+
+@tracked("Retire On Dividends")
 def rod():
     st.header("Retire On Dividends 💸", divider="rainbow")
 
@@ -67,28 +27,27 @@ def rod():
         st.session_state.period = "5d"
 
     def get_data(ticker):
-        tick = yf.Ticker(ticker)
-        hist = tick.history(period="max", back_adjust=True, auto_adjust=False)
-        hist.index = hist.index.tz_convert('America/New_York')  # Ensure the index is timezone-aware
-        return tick, hist
+        hist = market.history(ticker, back_adjust=True, auto_adjust=False)
+        hist = hist.tz_convert('America/New_York')  # Ensure the index is timezone-aware
+        return hist
 
     def main():
-        tick, hist = get_data(ticker)
-        chart_data = hist
+        with span("fetch history"):
+            hist = get_data(ticker)
 
         yields = pd.DataFrame()
 
         if hist.get("Dividends") is not None:
-            hist_div_filtered = hist[hist["Dividends"] != 0]
-            yields["Price"] = hist_div_filtered["Close"]
-            yields["Dividend"] = hist_div_filtered["Dividends"]
-            yields["Yield"] = ((yields["Dividend"] * 12) / yields["Price"]) * 100
+            with span("dividend yields"):
+                yields = dividend_yields(hist)
+
+            # dividend totals and yields, updated with the bars that arrived since the last render
+            with span("rolling stats"):
+                stats = rolling.stats((ticker, "back"), hist)
 
             tab1, tab2, tab3 = st.tabs(["Stock Price", "History", "Dividends"])
             with tab1:
                 col1, col2, col3, col4, col5, col6, col7, col8 = st.columns(8)
-                today = pd.Timestamp.now(tz='America/New_York')
-
                 # Update the period in session state based on button clicks
                 if col1.button("5D"):
                     st.session_state.period = "5d"
@@ -107,40 +66,36 @@ def rod():
                 if col8.button("MAX"):
                     st.session_state.period = "max"
 
-                # Filter data based on the selected period
-                period_map = {
-                    "5d": pd.DateOffset(days=6),
-                    "1mo": pd.DateOffset(months=1),
-                    "3mo": pd.DateOffset(months=3),
-                    "6mo": pd.DateOffset(months=6),
-                    "1y": pd.DateOffset(years=1),
-                    "5y": pd.DateOffset(years=5),
-                }
-
-                if st.session_state.period in period_map:
-                    if st.session_state.period == "ytd":
-                        chart_data = hist.loc[hist.index >= today.replace(month=1, day=1)]
-                    else:
-                        chart_data = hist.loc[hist.index >= today - period_map[st.session_state.period]]
-                else:
-                    chart_data = hist
+                # period ranges and their first/last/min/max closes are resolved once per history
+                with span("period summary"):
+                    periods = period_index((ticker, "back"), hist)
+                    summary = periods.summary(st.session_state.period)
 
-                line_color = "red" if chart_data.iloc[-1]["Close"] < chart_data.iloc[0]["Close"] else "green"
-                raw_difference = round(chart_data.iloc[-1]['Close'] - chart_data.iloc[0]['Close'], 2)
-                percent_difference = round(((chart_data.iloc[-1]['Close'] - chart_data.iloc[0]['Close']) / chart_data.iloc[0]['Close']) * 100, 2)
+                line_color = "red" if summary["last"] < summary["first"] else "green"
+                raw_difference = round(summary["change"], 2)
+                percent_difference = round(summary["percent"], 2)
                 if line_color == "green":
                     raw_difference = "+" + str(raw_difference)
                     percent_difference = "+" + str(percent_difference)
 
-                fig = go.Figure(go.Scatter(x=chart_data.index, y=chart_data["Close"], mode="lines", name="Close Price", line=dict(color=line_color), fill="tozeroy"))
-                fig.update_layout(yaxis_range=[chart_data["Close"].min()*0.98, chart_data["Close"].max()])
-                # fig.update_layout(title_text=f"{raw_difference} ({percent_difference}%)", title_font_color=line_color, font=dict(size=50))
-                fig.update_layout(title=dict(text=f"{raw_difference} ({percent_difference}%)", font=dict(size=24, color=line_color)))
-                st.plotly_chart(fig)
+                # a decades long history has far more bars than the chart has pixels
+                with span("plot price"):
+                    line = periods.line(st.session_state.period)
+                    fig = go.Figure(go.Scatter(x=line.index, y=line, mode="lines", name="Close Price", line=dict(color=line_color), fill="tozeroy"))
+                    fig.update_layout(yaxis_range=[summary["low"]*0.98, summary["high"]])
+                    # fig.update_layout(title_text=f"{raw_difference} ({percent_difference}%)", title_font_color=line_color, font=dict(size=50))
+                    fig.update_layout(title=dict(text=f"{raw_difference} ({percent_difference}%)", font=dict(size=24, color=line_color)))
+                    st.plotly_chart(fig)
 
             with tab2:
                 hist_filtered = hist.drop(columns=["Dividends", "Stock Splits", "Capital Gains"])
-                st.table(hist_filtered)
+
+                # only the rows of the selected page are sent to the browser
+                col1, col2 = st.columns([1, 3])
+                page_size = col1.selectbox("Rows per page", PAGE_SIZES)
+                page = col2.number_input("Page", min_value=1, max_value=page_count(len(hist_filtered), page_size), value=1)
+                with span("history table"):
+                    st.dataframe(table_page(hist_filtered, page, page_size), use_container_width=True)
             
             with tab3:
                 st.table(yields)
@@ -151,21 +106,18 @@ def rod():
             capital_appreciation = hist.iloc[-1]["Close"] - avg_purchase_price
 
             col1, col2, col3 = st.columns(3)
-            col1.metric("Avg. Stock Price", f"${round(yields['Price'].mean(), 2)}")
+            col1.metric("Avg. Stock Price", f"${round(stats.average_payment_close, 2)}")
             col2.metric("Capital Appreciation", f"${round(capital_appreciation, 2)}", f"{round((capital_appreciation / avg_purchase_price) * 100, 2)}%")
-            col3.metric("Total Return", f"${round(capital_appreciation + yields['Dividend'].sum(), 2)}", f"{round(((capital_appreciation + yields['Dividend'].sum()) / avg_purchase_price) * 100, 2)}%")
+            col3.metric("Total Return", f"${round(capital_appreciation + stats.dividend_sum, 2)}", f"{round(((capital_appreciation + stats.dividend_sum) / avg_purchase_price) * 100, 2)}%")
 
             st.divider()
 
             col1, col2, col3 = st.columns(3)
-            col1.metric("Total Dividends", f"${round(yields['Dividend'].sum(), 2)}")
-            col2.metric("Avg. Dividend Payout", f"${round(yields['Dividend'].mean(), 2)}")
+            col1.metric("Total Dividends", f"${round(stats.dividend_sum, 2)}")
+            col2.metric("Avg. Dividend Payout", f"${round(stats.average_payout, 2)}")
 
-            today = pd.Timestamp.today().tz_localize("America/New_York")
-            three_months_ago = today - pd.DateOffset(months=3)
-            last_3_months = yields[yields.index >= pd.to_datetime(three_months_ago)]
-            last_3_months = last_3_months[last_3_months["Dividend"] != 0]
-            col3.metric("T3 Avg. Yield", f"{round(last_3_months['Yield'].mean(), 2)}%")
+            t3_yield = stats.period_yield()
+            col3.metric("T3 Avg. Yield", f"{round(t3_yield, 2)}%")
 
             st.divider()
 
@@ -173,19 +125,37 @@ def rod():
 
             starting_investment = st.number_input("Starting Investment", 0, 1000000, 1000)
             monthly_investment = st.number_input("Monthly Investment", 0, 1000000, 500)
-            tax_rate = st.selectbox("Tax Rate %", [10, 12, 22, 24, 32, 35, 37], index=2)
+            tax_rate = st.selectbox("Tax Rate %", TAX_BRACKETS, index=2)
             expense_ratio = st.number_input("Expense Ratio %", 0.0, 5.0, 1.01)
 
             st.markdown("### Est. Monthly Income after fees")
-            tab1, tab2 = st.tabs(["Chart", "Table"])
-            future_data = calculate_future_income(age_range, last_3_months['Yield'].mean(), starting_investment, monthly_investment, capital_appreciation, tax_rate, expense_ratio)
-            with tab1:
+            tab1, tab2, tab3 = st.tabs(["Chart", "Table", "Market Simulator"])
+            with span("project income"):
+                future_data = calculate_future_income(age_range, t3_yield, starting_investment, monthly_investment, capital_appreciation, tax_rate, expense_ratio)
+            with tab1, span("plot income"):
                 st.plotly_chart(go.Figure(go.Scatter(x=future_data["Date"], y=future_data["Total Monthly Income"], mode="lines", name="Total Monthly Income")))
             with tab2:
                 st.table(future_data)
+            with tab3:
+                col1, col2, col3 = st.columns(3)
+                sim_method = col1.selectbox("Returns", ["bootstrap", "parametric"])
+                sim_paths = col2.number_input("Paths", 100, 100000, 10000, step=1000)
+                run_simulation = col3.toggle("Run Simulation")
+                if run_simulation:
+                    with st.spinner("Simulating..."), span("simulate"):
+                        bands = simulation((ticker, "back"), hist, age_range, starting_investment, monthly_investment, tax_rate, expense_ratio, paths=sim_paths, method=sim_method)
+
+                    # shade the 5-95 and 25-75 percentile bands around the median income
+                    fig = go.Figure()
+                    for low, high, opacity in ((5, 95, 0.15), (25, 75, 0.3)):
+                        fig.add_trace(go.Scatter(x=bands["Date"], y=bands[f"Total Monthly Income P{high}"], mode="lines", line=dict(width=0, color="green"), showlegend=False))
+                        fig.add_trace(go.Scatter(x=bands["Date"], y=bands[f"Total Monthly Income P{low}"], mode="lines", line=dict(width=0, color="green"), fill="tonexty", fillcolor=f"rgba(0, 128, 0, {opacity})", name=f"P{low}-P{high}"))
+                    fig.add_trace(go.Scatter(x=bands["Date"], y=bands["Total Monthly Income P50"], mode="lines", line=dict(color="green"), name="Median"))
+                    st.plotly_chart(fig)
 
             with st.expander("Related News"):
-                news = tick.news
+                with span("fetch news"):
+                    news = market.news(ticker)
                 for idx, item in enumerate(news):
                     st.markdown(f"### [{item['title']}]({item['link']})")
                     pub_date = pd.to_datetime(item["providerPublishTime"], unit="s")
@@ -0,0 +1,60 @@
+"""Synthetic, deterministic inputs for the benchmarks, nothing here touches the network"""
+
+import numpy as np
+import pandas as pd
+
+from core.bulk import SyntheticSource
+from core.ledger import DATE_FORMAT, MARKET_TZ
+
+
+END = pd.Timestamp("2026-01-02", tz=MARKET_TZ)
+
+
+def symbols(count):
+    return [f"S{number:04d}" for number in range(count)]
+
+
+def histories(tickers, years=30, end=END):
+    """Daily bars with a monthly dividend for every ticker, years long"""
+
+    source = SyntheticSource(years=years, end=end)
+    return {ticker: source.history(ticker) for ticker in tickers}
+
+
+def dividends(histories):
+    return {ticker: hist["Dividends"][hist["Dividends"] != 0] for ticker, hist in histories.items()}
+
+
+def write_ledger(path, rows, tickers, years=10, end=END, seed=0):
+    """Writes a portfolio.csv style ledger of rows transactions spread over the last years
+
+    Mostly buys, with dividend reinvestments and the occasional sell, in date order as the
+    dashboard appends them.
+    """
+
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(end=end.tz_localize(None), periods=252 * years)
+    # formatting the distinct days once is much faster than a row at a time
+    positions = np.sort(rng.integers(0, len(days), rows))
+    ledger = pd.DataFrame({
+        "Date": np.asarray(days.strftime(DATE_FORMAT), dtype=object)[positions],
+        "Ticker": rng.choice(tickers, rows),
+        "Shares": np.round(rng.uniform(0.01, 20, rows), 2),
+        "Price": np.round(rng.uniform(5, 50, rows), 2),
+        "Type": rng.choice(["Buy", "Drip", "Sell"], rows, p=[0.8, 0.15, 0.05]),
+    })
+    ledger.to_csv(path, index=False)
+    return path
+
+
+def rebalance_input(count=500, seed=0):
+    """Holdings with equal target weights, the way the rebalancer editor submits them"""
+
+    rng = np.random.default_rng(seed)
+    holdings = pd.DataFrame({
+        "Ticker": symbols(count),
+        "Shares": np.round(rng.uniform(0, 100, count), 2),
+        "Target Weight %": 100 / count,
+    })
+    prices = np.round(rng.uniform(5, 50, count), 2)
+    return holdings, prices
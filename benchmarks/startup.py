@@ -0,0 +1,101 @@
+"""Cold start time and peak memory of the Streamlit entry points
+
+Every entry point is executed in a fresh interpreter, once per repeat, up to the point where
+Streamlit would render the first page: the navigation is built but no page runs and the
+prefetcher thread is not started, so the numbers only cover the entry point's own imports and
+setup. Results are printed as JSON, --baseline compares them with an earlier run.
+
+    python benchmarks/startup.py --output startup.json
+    python benchmarks/startup.py --baseline startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_POINTS = ["main.py", "app/main.py"]
+
+# slowdown (or memory growth) over the baseline reported as a regression
+TOLERANCE = 0.2
+
+# runs inside the fresh interpreter, prints one JSON line
+CHILD = """
+import json, resource, runpy, sys, time
+start = time.perf_counter()
+import streamlit as st
+import core.prefetch
+core.prefetch.Prefetcher.start = lambda self: self
+st.navigation = lambda pages, **kwargs: type("Navigation", (), {"run": lambda self: None})()
+sys.argv = [sys.argv[1]]
+runpy.run_path(sys.argv[0], run_name="__main__")
+seconds = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"seconds": seconds, "peak_rss_mb": peak / (1024 * 1024 if sys.platform == "darwin" else 1024), "modules": len(sys.modules)}))
+"""
+
+
+def measure(entry_point):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    process = subprocess.run([sys.executable, "-c", CHILD, os.path.join(ROOT, entry_point)], cwd=ROOT, env=env, capture_output=True, text=True)
+    if process.returncode != 0:
+        return {"error": process.stderr.strip().splitlines()[-1] if process.stderr.strip() else f"exit code {process.returncode}"}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def run(entry_points=ENTRY_POINTS, repeat=5):
+    """Median start time, peak RSS and loaded module count of each entry point"""
+
+    results = {}
+    for entry_point in entry_points:
+        runs = [measure(entry_point) for _ in range(repeat)]
+        failed = [run for run in runs if "error" in run]
+        if failed:
+            results[entry_point] = failed[0]
+            continue
+        results[entry_point] = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+    return results
+
+
+def regressions(results, baseline, tolerance=TOLERANCE, keys=("seconds", "peak_rss_mb")):
+    """Every measurement that grew by more than tolerance over the baseline"""
+
+    found = []
+    for name, result in results.items():
+        before = baseline.get(name, {})
+        for key in keys:
+            if key in result and key in before and result[key] > before[key] * (1 + tolerance):
+                found.append(f"{name} {key}: {before[key]:.3f} -> {result[key]:.3f}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("entry_points", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="file to write the results to")
+    parser.add_argument("--baseline", help="results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    results = run(args.entry_points, args.repeat)
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(text + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            found = regressions(results, json.load(handle), args.tolerance)
+        for regression in found:
+            print(f"regression: {regression}", file=sys.stderr)
+        sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Offline benchmarks of the dashboard's hot paths on synthetic data
+
+Every case builds its inputs untimed, then reports the median and best wall time of its
+repeats and the peak memory Python and numpy allocated during one extra traced run. Results
+are printed as JSON, --output keeps them and --baseline compares with an earlier run.
+
+    python benchmarks/suite.py --output before.json
+    python benchmarks/suite.py --baseline before.json
+    python benchmarks/suite.py --quick --filter portfolio
+"""
+
+import argparse
+import functools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# the caches the code under test writes go to a scratch directory, never the real .cache
+SCRATCH = tempfile.TemporaryDirectory(prefix="rod-benchmarks-")
+os.environ["ROD_CACHE_DIR"] = SCRATCH.name
+
+import numpy as np
+import pandas as pd
+
+import fixtures
+from startup import TOLERANCE, regressions
+from core.allocation import allocate
+from core.bulk import build_panel
+from core.dividends import project_dividends
+from core.ledger import LedgerSnapshot, attribute_dividends, read_ledger
+from core.projection import calculate_future_income
+from core.rebalance import rebalance_plan
+from core.screener import screen
+
+
+REPEAT = 5
+CASES = {}
+
+
+def case(name, quick=True):
+    """Registers a benchmark, the decorated function builds the inputs and returns the timed call"""
+
+    def register(setup):
+        CASES[name] = {"setup": setup, "quick": quick}
+        return setup
+
+    return register
+
+
+@case("projection/calculate_future_income 42y")
+def _():
+    return lambda: calculate_future_income([23, 65], 90.28, 1000, 833.33, 38.62, 22, 1.01)
+
+
+@case("projection/calculate_future_income 82y")
+def _():
+    return lambda: calculate_future_income([18, 100], 90.28, 1000, 833.33, 38.62, 22, 1.01)
+
+
+@case("rebalance/allocate 500 tickers")
+def _():
+    holdings, prices = fixtures.rebalance_input(500)
+    value = holdings["Shares"].to_numpy() * prices
+    target = (value.sum() + 50_000) / len(value)
+    return lambda: allocate(np.maximum(0, target - value), 50_000, 1, fallback=np.full(len(value), target))
+
+
+@case("rebalance/plan 500 tickers")
+def _():
+    holdings, prices = fixtures.rebalance_input(500)
+    return lambda: rebalance_plan(holdings, prices, 50_000, 1)
+
+
+@case("rebalance/project_dividends 500 tickers 30y")
+def _():
+    rng = np.random.default_rng(0)
+    inputs = rng.uniform(0, 100, 500), rng.uniform(0.1, 1, 500), rng.normal(0, 0.01, 500), rng.choice([12, 4, 2, 1], 500), rng.integers(0, 12, 500)
+    return lambda: project_dividends(*inputs, months=360)
+
+
+@functools.lru_cache(maxsize=None)
+def ledger(rows):
+    return fixtures.write_ledger(os.path.join(SCRATCH.name, f"ledger-{rows}.csv"), rows, fixtures.symbols(50))
+
+
+@functools.lru_cache(maxsize=None)
+def ledger_dividends():
+    return fixtures.dividends(fixtures.histories(fixtures.symbols(50), years=10))
+
+
+def _attribution(rows, quick):
+    @case(f"portfolio/attribute_dividends {rows:,} rows", quick)
+    def _():
+        path, dividends = ledger(rows), ledger_dividends()
+        return lambda: attribute_dividends(read_ledger(path), dividends)
+
+    @case(f"portfolio/snapshot cold {rows:,} rows", quick)
+    def _():
+        path, dividends = ledger(rows), ledger_dividends()
+
+        def run():
+            snapshot = LedgerSnapshot(path, directory=tempfile.mkdtemp(dir=SCRATCH.name))
+            snapshot.refresh()
+            return snapshot.attribute_dividends(dividends)
+
+        return run
+
+    @case(f"portfolio/snapshot warm {rows:,} rows", quick)
+    def _():
+        path, dividends = ledger(rows), ledger_dividends()
+        snapshot = LedgerSnapshot(path, directory=tempfile.mkdtemp(dir=SCRATCH.name))
+        snapshot.refresh()
+
+        def run():
+            snapshot.refresh()
+            return snapshot.attribute_dividends(dividends)
+
+        return run
+
+    @case(f"portfolio/snapshot append {rows:,} rows", quick)
+    def _():
+        # a copy, the appended rows would change the ledger of the other cases
+        path = os.path.join(tempfile.mkdtemp(dir=SCRATCH.name), "portfolio.csv")
+        shutil.copyfile(ledger(rows), path)
+        dividends = ledger_dividends()
+        snapshot = LedgerSnapshot(path, directory=os.path.dirname(path))
+        snapshot.refresh()
+        row = f"{fixtures.END:%m-%d-%Y},{fixtures.symbols(1)[0]},1.5,20.00,Drip\n"
+
+        def run():
+            with open(path, "a") as handle:
+                handle.write(row)
+            snapshot.refresh()
+            return snapshot.attribute_dividends(dividends)
+
+        return run
+
+
+for _rows, _quick in ((10_000, True), (100_000, True), (1_000_000, False)):
+    _attribution(_rows, _quick)
+
+
+def _screener(count, quick):
+    @case(f"screener/screen {count} symbols 10y", quick)
+    def _():
+        tickers = fixtures.symbols(count)
+        panel = build_panel(fixtures.histories(tickers, years=10))
+        return lambda: screen(panel, tickers)
+
+
+for _count, _quick in ((27, True), (1000, False)):
+    _screener(_count, _quick)
+
+
+def measure(run, repeat=REPEAT):
+    run()  # warm up imports and lazily built state
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"seconds": statistics.median(times), "min_seconds": min(times), "peak_mb": peak / 2 ** 20}
+
+
+def run(pattern=None, quick=False, repeat=REPEAT):
+    results = {}
+    for name, entry in CASES.items():
+        if (pattern and pattern not in name) or (quick and not entry["quick"]):
+            continue
+        print(f"{name}...", file=sys.stderr)
+        results[name] = measure(entry["setup"](), repeat)
+    return results
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", help="only run the cases whose name contains this")
+    parser.add_argument("--quick", action="store_true", help="skip the largest inputs")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--output", help="file to write the results to")
+    parser.add_argument("--baseline", help="results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    results = {"meta": metadata(), "results": run(args.filter, args.quick, args.repeat)}
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(text + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            found = regressions(results["results"], json.load(handle)["results"], args.tolerance, keys=("seconds", "peak_mb"))
+        for regression in found:
+            print(f"regression: {regression}", file=sys.stderr)
+        sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
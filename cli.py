@@ -0,0 +1,132 @@
+"""Runs the dashboard calculations without Streamlit, e.g. from cron or over many accounts
+
+    python cli.py projection --ticker MSTY --ages 23 65 --monthly 500
+    python cli.py rebalance holdings.csv --deposit 500 --format csv
+    python cli.py screener --period 3mo --output screener.json
+    python cli.py portfolio portfolio.csv other.csv --totals
+
+Every command prints a table as JSON records (default) or CSV, or writes it to --output.
+"""
+
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+from core import market
+from core.bulk import panel_cache
+from core.dividends import dividend_yields, trailing_yield
+from core.history import PERIOD_OFFSETS
+from core.projection import TAX_BRACKETS, calculate_future_income
+from core.rebalance import latest_prices, rebalance_plan
+from core.screener import UNIVERSE_FILE, screen, universe
+from core.summary import ledger_summary, portfolio_totals
+
+
+PLAN_COLUMNS = {
+    "Ticker": "Ticker",
+    "Shares": "Shares",
+    "Price": "Price",
+    "Target Weight %": "Target Weight %",
+    "current_weight": "Current Weight",
+    "additional_investment": "Additional Investment",
+    "shares_to_buy": "Shares to Buy",
+    "future_weight": "Future Weight",
+}
+
+
+def projection(args):
+    average_yield = args.yield_percent
+    if average_yield is None:
+        average_yield = trailing_yield(dividend_yields(market.history(args.ticker, back_adjust=True, auto_adjust=False)))
+    return calculate_future_income(args.ages, average_yield, args.starting, args.monthly, args.appreciation, args.tax, args.expense)
+
+
+def rebalance(args):
+    holdings = pd.read_csv(args.holdings)
+    if holdings["Target Weight %"].sum() != 100:
+        raise SystemExit("The sum of target weights should be equal to 100.")
+
+    plan = rebalance_plan(holdings, latest_prices(holdings["Ticker"]), args.deposit, args.lot)
+    return plan[list(PLAN_COLUMNS)].rename(columns=PLAN_COLUMNS)
+
+
+def screener(args):
+    symbols = [symbol.upper() for symbol in args.symbols] or universe(args.universe)
+    return screen(panel_cache.panel(symbols, args.period), symbols, prices=args.prices)
+
+
+def portfolio(args):
+    frames = []
+    for path in args.ledgers:
+        summary = ledger_summary(path)
+        if args.totals:
+            summary = pd.DataFrame([portfolio_totals(summary)])
+        summary.insert(0, "Account", os.path.splitext(os.path.basename(path))[0])
+        frames.append(summary)
+    return pd.concat(frames, ignore_index=True)
+
+
+def write(frame, fmt, output):
+    if fmt == "csv":
+        text = frame.to_csv(index=False)
+    else:
+        text = frame.to_json(orient="records", date_format="iso", indent=2) + "\n"
+
+    if output is None:
+        sys.stdout.write(text)
+    else:
+        with open(output, "w") as handle:
+            handle.write(text)
+
+
+def parser():
+    # every command takes the output options after its own arguments
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("--format", choices=["json", "csv"], default="json")
+    output.add_argument("--output", help="file to write instead of stdout")
+
+    parser = argparse.ArgumentParser(description="Headless ROD calculations")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("projection", parents=[output], help="monthly dividend income until retirement")
+    source = command.add_mutually_exclusive_group(required=True)
+    source.add_argument("--ticker", help="use the T3 average yield of this ticker")
+    source.add_argument("--yield", dest="yield_percent", type=float, help="average yield %%")
+    command.add_argument("--ages", type=int, nargs=2, default=[23, 65], metavar=("CURRENT", "RETIREMENT"))
+    command.add_argument("--starting", type=float, default=1000)
+    command.add_argument("--monthly", type=float, default=500)
+    command.add_argument("--appreciation", type=float, default=0.0, help="capital appreciation per share")
+    command.add_argument("--tax", type=int, choices=TAX_BRACKETS, default=22)
+    command.add_argument("--expense", type=float, default=1.01, help="expense ratio %%")
+    command.set_defaults(run=projection)
+
+    command = commands.add_parser("rebalance", parents=[output], help="buy orders that move holdings towards their target weights")
+    command.add_argument("holdings", help="CSV with Ticker, Shares and Target Weight %% columns")
+    command.add_argument("--deposit", type=float, default=500)
+    command.add_argument("--lot", type=float, default=1, help="minimum fractional investment")
+    command.set_defaults(run=rebalance)
+
+    command = commands.add_parser("screener", parents=[output], help="dividend yield and risk of a list of symbols")
+    command.add_argument("symbols", nargs="*", help="defaults to the universe file")
+    command.add_argument("--universe", default=UNIVERSE_FILE, help="file listing the symbols to screen")
+    command.add_argument("--period", default="max", choices=[*PERIOD_OFFSETS, "ytd", "max"])
+    command.add_argument("--prices", action="store_true", help="include the closing prices")
+    command.set_defaults(run=screener)
+
+    command = commands.add_parser("portfolio", parents=[output], help="value, gains and dividends of portfolio.csv ledgers")
+    command.add_argument("ledgers", nargs="*", default=["portfolio.csv"])
+    command.add_argument("--totals", action="store_true", help="one row of totals per ledger")
+    command.set_defaults(run=portfolio)
+
+    return parser
+
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    write(args.run(args), args.format, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Shared compute and data helpers used by both the Streamlit pages and the headless scripts"""
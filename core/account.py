@@ -0,0 +1,39 @@
+from core.ingest import holdings_frame
+from core.market import coalescer
+from core.robinhood import client
+
+
+# account data lives under one pseudo symbol, so it can be invalidated in one go
+ACCOUNT = "ACCOUNT"
+
+
+def _get(endpoint, fetch, ttl=None, refresh=False):
+    return coalescer.get((ACCOUNT, endpoint, ()), fetch, ttl, refresh)
+
+
+def holdings(ttl=None, refresh=False):
+    """Current holdings, one row per symbol with numeric columns"""
+
+    return _get("holdings", lambda: holdings_frame(client().account.build_holdings(with_dividends=True)), ttl, refresh)
+
+
+def transfers(ttl=None, refresh=False):
+    return _get("transfers", lambda: client().account.get_unified_transfers(), ttl, refresh)
+
+
+def portfolio_profile(ttl=None, refresh=False):
+    return _get("portfolio_profile", lambda: client().load_portfolio_profile(), ttl, refresh)
+
+
+def total_dividends(ttl=None, refresh=False):
+    return _get("total_dividends", lambda: client().get_total_dividends(), ttl, refresh)
+
+
+def stock_orders(ttl=None, refresh=False):
+    return _get("orders", lambda: client().get_all_stock_orders(), ttl, refresh)
+
+
+def invalidate():
+    """Forgets every cached account response, the next request goes back to Robinhood"""
+
+    coalescer.invalidate(ACCOUNT)
@@ -0,0 +1,41 @@
+import numpy as np
+
+
+# absorbs float noise so 2.9999999 lots counts as 3
+EPSILON = 1e-9
+
+
+def allocate(shortfall, deposit, lot, fallback=None):
+    """Splits a deposit across holdings in whole lots, proportionally to their shortfall
+
+    Every holding first gets the whole lots of its proportional share. The lots that are left
+    over go one each to the holdings with the largest fractional remainder (largest remainder
+    method), so at most one extra lot per holding and no loop over the deposit amount. Every
+    non zero allocation is a multiple of lot, a lot of 0 splits the deposit exactly. When
+    nothing is short of its target the deposit is split by fallback (e.g. the target values).
+    """
+
+    shortfall = np.asarray(shortfall, dtype=float)
+    basis = shortfall
+    if basis.sum() <= 0 and fallback is not None:
+        basis = np.maximum(0, np.asarray(fallback, dtype=float))
+
+    total = basis.sum()
+    if total <= 0 or deposit <= 0:
+        return np.zeros(len(shortfall))
+
+    ideal = basis / total * deposit
+    if lot <= 0:
+        return ideal
+
+    ideal_lots = ideal / lot
+    lots = np.floor(ideal_lots + EPSILON)
+
+    # whole lots the deposit can still pay for after the proportional floors
+    leftover = int(np.floor(deposit / lot + EPSILON) - lots.sum())
+    if leftover > 0:
+        remainders = np.where(basis > 0, ideal_lots - lots, -np.inf)
+        order = np.argsort(-remainders, kind="stable")[:leftover]
+        lots[order[np.isfinite(remainders[order])]] += 1
+
+    return lots * lot
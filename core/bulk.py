@@ -0,0 +1,126 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from core.history import MARKET_TZ, adjustment_mode, history_cache, is_stale, period_start
+from core.market import coalescer
+
+
+# yfinance is network bound, a handful of threads hides most of the round trip latency
+MAX_WORKERS = 8
+
+# the columns the screener reads, the panel cache leaves the rest on disk
+PANEL_FIELDS = ["Close", "Dividends"]
+
+
+class SyntheticSource:
+    """Generates random daily bars with a fake network delay, for benchmarking without yfinance
+
+    Every symbol gets a deterministic random walk with a dividend on the first trading day of
+    each month.
+    """
+
+    def __init__(self, years=10, latency=0.0, end=None):
+        self.years = years
+        self.latency = latency
+        self.end = end
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def history(self, symbol, start=None, back_adjust=False, auto_adjust=True):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        end = self.end if self.end is not None else pd.Timestamp.now(tz=MARKET_TZ).normalize()
+        dates = pd.bdate_range(end=end, periods=252 * self.years, tz=MARKET_TZ)
+
+        rng = np.random.default_rng(sum(symbol.encode()))
+        close = 20 * np.exp(np.cumsum(rng.normal(0.0, 0.015, len(dates))))
+        first_of_month = np.r_[True, dates.month[1:] != dates.month[:-1]]
+
+        hist = pd.DataFrame({
+            "Open": close,
+            "High": close,
+            "Low": close,
+            "Close": close,
+            "Volume": rng.integers(1_000, 1_000_000, len(dates)),
+            "Dividends": np.where(first_of_month, close * 0.01, 0.0),
+            "Stock Splits": 0.0,
+        }, index=dates)
+
+        if start is not None:
+            hist = hist[hist.index >= start]
+        return hist
+
+
+def fetch_histories(symbols, cache=history_cache, max_workers=MAX_WORKERS, **kwargs):
+    """Loads the full history of every symbol through the history cache on a bounded thread pool"""
+
+    symbols = list(dict.fromkeys(symbols))
+    stats = coalescer.current_stats()
+
+    # the workers count their upstream fetches under the render that asked for them
+    def fetch(symbol):
+        with coalescer.bound(stats):
+            return cache.history(symbol, **kwargs)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(symbols)))) as pool:
+        return dict(zip(symbols, pool.map(fetch, symbols)))
+
+
+def build_panel(histories, start=None):
+    """Aligns per symbol histories into one dates x (field, symbol) frame
+
+    Days a symbol did not trade are left as NaN prices with zero dividends and splits.
+    """
+
+    frames = {symbol: hist if start is None else hist.iloc[hist.index.searchsorted(start):] for symbol, hist in histories.items()}
+    if not frames:
+        return pd.DataFrame()
+
+    panel = pd.concat(frames, axis=1, names=["Symbol", "Field"]).swaplevel(axis=1).sort_index(axis=1)
+    for field in ("Dividends", "Stock Splits"):
+        if field in panel.columns.get_level_values("Field"):
+            panel[field] = panel[field].fillna(0.0)
+
+    return panel
+
+
+class PanelCache:
+    """Keeps the last aligned panel per (symbols, period) until its histories go stale
+
+    Once the stored histories are up to date the panel is read straight from the column store,
+    only the fields asked for and only the dates of the period are mapped.
+    """
+
+    def __init__(self, cache=history_cache, max_workers=MAX_WORKERS, fields=PANEL_FIELDS):
+        self.cache = cache
+        self.max_workers = max_workers
+        self.fields = list(fields)
+        self.panels = {}
+
+    def panel(self, symbols, period="max", now=None):
+        if now is None:
+            now = pd.Timestamp.now(tz=MARKET_TZ)
+
+        key = (tuple(symbols), period)
+        entry = self.panels.get(key)
+        if entry is not None and not is_stale(entry["fetched"], now):
+            return entry["panel"]
+
+        fetch_histories(symbols, cache=self.cache, max_workers=self.max_workers, now=now)
+        start = period_start(period, now)
+        mode = adjustment_mode(back_adjust=False, auto_adjust=True)
+        panel = pd.concat({field: self.cache.store.field(symbols, mode, field, start) for field in self.fields}, axis=1, names=["Field", "Symbol"])
+        if "Dividends" in self.fields:
+            panel["Dividends"] = panel["Dividends"].fillna(0.0)
+        self.panels[key] = {"fetched": now, "panel": panel}
+        return panel
+
+
+panel_cache = PanelCache()
@@ -0,0 +1,167 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from core import market
+from core.dividends import dividend_growth, months_since, payment_frequency
+from core.history import MARKET_TZ
+from core.projection import add_months
+from core.rolling import rolling
+
+
+# months past today the upcoming payments of every symbol are projected
+HORIZON_MONTHS = 12
+
+
+class DividendCalendar:
+    """Ex-date index of the paid and projected dividends of many symbols
+
+    Every symbol keeps its dividend history, detected payment frequency and growth, and its
+    expected payments up to HORIZON_MONTHS ahead, each following the last one by one payment
+    period (a whole number of weeks for weekly and biweekly payers, of months otherwise). All events are merged into arrays sorted by ex-date, so a date range across every
+    symbol is two binary searches. refresh only rebuilds the symbols that paid since the last
+    refresh, it reads their payments from the incremental rolling stats instead of rescanning
+    the histories.
+    """
+
+    def __init__(self, horizon_months=HORIZON_MONTHS):
+        self.horizon_months = horizon_months
+        self.symbols = {}
+        self._index = None
+        self._lock = threading.Lock()
+
+    def refresh(self, symbols, today=None):
+        """Brings the given symbols up to date with their cached histories, fetching the missing ones"""
+
+        if today is None:
+            today = pd.Timestamp.now(tz=MARKET_TZ)
+        for symbol in dict.fromkeys(symbol.upper() for symbol in symbols):
+            stats = rolling.stats((symbol, "auto"), market.history(symbol))
+
+            # a new month moves the projection horizon as well
+            signature = (stats.payment_count, stats.payments[-1][:2] if stats.payments else None, (today.year, today.month))
+            entry = self.symbols.get(symbol)
+            if entry is not None and entry["signature"] == signature:
+                continue
+
+            dates = np.array([date for date, _, _ in stats.payments], dtype="datetime64[ns]")
+            amounts = np.array([dividend for _, dividend, _ in stats.payments], dtype=float)
+            self.update(symbol, pd.Series(amounts, index=pd.DatetimeIndex(dates).tz_localize("UTC").tz_convert(MARKET_TZ)), today, signature)
+
+    def update(self, symbol, dividends, today=None, signature=None):
+        """Replaces the dividend history of symbol, a Series of amounts indexed by ex-date"""
+
+        if today is None:
+            today = pd.Timestamp.now(tz=MARKET_TZ)
+        symbol = symbol.upper()
+        dividends = dividends[dividends != 0].sort_index()
+
+        frequency = payment_frequency(dividends)
+        growth = dividend_growth(dividends, frequency)
+        entry = {
+            "signature": signature,
+            "dividends": dividends,
+            "frequency": frequency,
+            "growth": growth,
+            "last_dividend": float(dividends.iloc[-1]) if len(dividends) else 0.0,
+            "last_date": dividends.index[-1] if len(dividends) else None,
+        }
+
+        # payments expected from the last one up to the horizon, one payment period apart
+        projected_dates = np.array([], dtype="datetime64[ns]")
+        projected_amounts = np.array([])
+        if entry["last_date"] is not None:
+            last_date = entry["last_date"].tz_convert(MARKET_TZ)
+            if frequency > 12:
+                # weekly and biweekly payers go ex on the same weekday, a whole number of weeks apart
+                step = 7 * (52 // frequency)
+                start = pd.Timestamp(last_date.date())
+                count = max(0, (pd.Timestamp(today.date()) + pd.DateOffset(months=self.horizon_months) - start).days // step)
+                projected_dates = start + pd.to_timedelta(step * np.arange(1, count + 1), unit="D")
+            else:
+                step = 12 // frequency
+                count = max(0, (months_since(entry["last_date"], today) + self.horizon_months) // step)
+                projected_dates = add_months(last_date, step * np.arange(1, count + 1))
+            projected_dates = projected_dates.tz_localize(MARKET_TZ).to_numpy(dtype="datetime64[ns]")
+            projected_amounts = entry["last_dividend"] * np.power(1 + growth, np.arange(count))
+
+        entry["dates"] = np.concatenate([dividends.index.to_numpy(dtype="datetime64[ns]"), projected_dates])
+        entry["amounts"] = np.concatenate([dividends.to_numpy(dtype=float), projected_amounts])
+        entry["projected"] = np.r_[np.zeros(len(dividends), dtype=bool), np.ones(len(projected_dates), dtype=bool)]
+
+        with self._lock:
+            self.symbols[symbol] = entry
+            self._index = None
+
+    def _merged(self):
+        with self._lock:
+            if self._index is None:
+                entries = self.symbols.items()
+                dates = np.concatenate([entry["dates"] for _, entry in entries] or [np.array([], dtype="datetime64[ns]")])
+                order = np.argsort(dates, kind="stable")
+                self._index = {
+                    "dates": dates[order],
+                    "symbols": np.concatenate([np.full(len(entry["dates"]), symbol, dtype=object) for symbol, entry in entries] or [np.array([], dtype=object)])[order],
+                    "amounts": np.concatenate([entry["amounts"] for _, entry in entries] or [np.array([])])[order],
+                    "projected": np.concatenate([entry["projected"] for _, entry in entries] or [np.array([], dtype=bool)])[order],
+                }
+            return self._index
+
+    def between(self, start, end, symbols=None, projected=True):
+        """Dividends with an ex-date from start to end (inclusive), across symbols or every symbol
+
+        Returns Date, Symbol, Dividend (per share) and Projected columns sorted by ex-date.
+        """
+
+        index = self._merged()
+        first = np.searchsorted(index["dates"], np.datetime64(pd.Timestamp(start).tz_convert("UTC").tz_localize(None), "ns"), side="left")
+        last = np.searchsorted(index["dates"], np.datetime64(pd.Timestamp(end).tz_convert("UTC").tz_localize(None), "ns"), side="right")
+
+        keep = np.ones(last - first, dtype=bool)
+        if symbols is not None:
+            keep &= np.isin(index["symbols"][first:last], [symbol.upper() for symbol in symbols])
+        if not projected:
+            keep &= ~index["projected"][first:last]
+
+        return pd.DataFrame({
+            "Date": pd.DatetimeIndex(index["dates"][first:last][keep]).tz_localize("UTC").tz_convert(MARKET_TZ),
+            "Symbol": index["symbols"][first:last][keep],
+            "Dividend": index["amounts"][first:last][keep],
+            "Projected": index["projected"][first:last][keep],
+        })
+
+    def upcoming(self, days=30, shares=None, today=None):
+        """Dividends going ex in the next days, with the Amount paid on shares (symbol -> shares)"""
+
+        if today is None:
+            today = pd.Timestamp.now(tz=MARKET_TZ)
+        events = self.between(today.normalize(), today.normalize() + pd.Timedelta(days=days), symbols=None if shares is None else list(shares))
+        if shares is not None:
+            events["Amount"] = events["Dividend"] * events["Symbol"].map(pd.Series(shares, dtype=float)).to_numpy()
+        return events
+
+    def dividends(self, symbol):
+        """Paid dividends of symbol indexed by ex-date, the same series as market.dividends"""
+
+        entry = self.symbols.get(symbol.upper())
+        return pd.Series(dtype=float) if entry is None else entry["dividends"]
+
+    def projection_inputs(self, symbols, today=None):
+        """Last dividend, growth, frequency and months since the last payment of every symbol,
+        in the order project_dividends takes them
+        """
+
+        if today is None:
+            today = pd.Timestamp.today()
+        last_dividends, growths, frequencies, months_since_last = [], [], [], []
+        for symbol in symbols:
+            entry = self.symbols[symbol.upper()]
+            last_dividends.append(entry["last_dividend"])
+            growths.append(entry["growth"])
+            frequencies.append(entry["frequency"])
+            months_since_last.append(0 if entry["last_date"] is None else months_since(entry["last_date"], today))
+        return last_dividends, growths, frequencies, months_since_last
+
+
+dividend_calendar = DividendCalendar()
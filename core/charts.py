@@ -0,0 +1,59 @@
+import numpy as np
+
+
+def stacked_totals(dates, labels, amounts, decimals=2):
+    """Builds the payload of a per-date total bar chart with a per-label breakdown on hover
+
+    Rows are sorted by date once, totals are summed per date run with np.add.reduceat and the
+    hover lines are formatted as one string array, so there is no groupby or row iteration.
+    Returns a dict with the bar x, y, text and hovertext.
+    """
+
+    amounts = np.asarray(amounts, dtype=float)
+    keep = amounts != 0
+    dates = np.asarray(dates)[keep]
+    labels = np.asarray(labels, dtype=str)[keep]
+    amounts = amounts[keep]
+
+    order = np.argsort(dates, kind="stable")
+    dates, labels, amounts = dates[order], labels[order], amounts[order]
+
+    starts = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1]]) if len(dates) else np.array([], dtype=int)
+    ends = np.r_[starts[1:], len(dates)]
+    totals = np.add.reduceat(amounts, starts) if len(amounts) else np.array([])
+
+    lines = np.char.add(np.char.add(labels, ": "), np.char.mod(f"%.{decimals}f", amounts)).tolist()
+    footers = np.char.mod(f"<br><br>Total: %.{decimals}f", totals).tolist()
+    hovertext = ["<br>".join(lines[start:end]) + footer for start, end, footer in zip(starts, ends, footers)]
+
+    return {
+        "x": dates[starts],
+        "y": totals,
+        "text": np.round(totals, decimals),
+        "hovertext": hovertext,
+    }
+
+
+def matrix_totals(dates, labels, matrix, decimals=2):
+    """Same payload as stacked_totals for a labels x dates matrix, e.g. projected dividends per holding"""
+
+    matrix = np.asarray(matrix, dtype=float)
+
+    # walk the transposed matrix so the rows come out already sorted by date
+    date_index, label_index = np.nonzero(matrix.T)
+    return stacked_totals(np.asarray(dates)[date_index], np.asarray(labels)[label_index], matrix[label_index, date_index], decimals)
+
+
+# rows per page offered by the paginated tables
+PAGE_SIZES = [50, 100, 250, 500]
+
+
+def page_count(rows, page_size):
+    return max(1, -(-rows // page_size))
+
+
+def table_page(rows, page, page_size):
+    """The rows of a 1 based page, so a table only ships the rows that are visible"""
+
+    page = min(max(1, page), page_count(len(rows), page_size))
+    return rows.iloc[(page - 1) * page_size:page * page_size]
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+from core.projection import add_months
+
+
+FREQUENCIES = {"Weekly": 52, "Biweekly": 26, "Monthly": 12, "Quarterly": 4, "Semiannual": 2, "Annual": 1}
+
+# longest horizon the future dividend projection is offered for
+MAX_YEARS = 30
+
+# years of payments the dividend growth is measured over, and the bounds on its annual rate,
+# a payout that jumped once is not compounded over the whole projection
+GROWTH_YEARS = 5
+MIN_GROWTH = -0.25
+MAX_GROWTH = 0.25
+
+
+def payment_frequency(dividends):
+    """Detects the number of payments per year from the gaps between the latest dividends
+
+    Funds with a single payment on record are assumed to pay monthly.
+    """
+
+    dates = pd.DatetimeIndex(dividends.index[-7:])
+    if len(dates) < 2:
+        return 12
+
+    gap = np.median(np.diff(dates.values) / np.timedelta64(1, "D"))
+    if gap <= 10:
+        return 52
+    if gap <= 21:
+        return 26
+    if gap <= 45:
+        return 12
+    if gap <= 120:
+        return 4
+    if gap <= 240:
+        return 2
+    return 1
+
+
+def dividend_growth(dividends, frequency=12):
+    """Growth per payment that compounds to the annualized growth of the trailing annual totals
+
+    A year is the last frequency payments, up to GROWTH_YEARS of them are compared and the
+    annual rate is clamped to MIN_GROWTH..MAX_GROWTH. 0 with less than two years of history.
+    """
+
+    years = min(GROWTH_YEARS, len(dividends) // frequency)
+    if years < 2:
+        return 0.0
+
+    totals = dividends.to_numpy(dtype=float)[-years * frequency:].reshape(years, frequency).sum(axis=1)
+    if totals[0] <= 0 or totals[-1] <= 0:
+        return 0.0
+    annual = np.clip((totals[-1] / totals[0]) ** (1 / (years - 1)) - 1, MIN_GROWTH, MAX_GROWTH)
+    return float((1 + annual) ** (1 / frequency) - 1)
+
+
+def months_since(date, today):
+    return (today.year - date.year) * 12 + (today.month - date.month)
+
+
+def project_dividends(shares, last_dividend, growth, frequency, months_since_last, months=12, start=None):
+    """Projects the dividends of every holding for the coming months in one broadcast
+
+    A holding has made elapsed * frequency // 12 payments elapsed months after its last one, so
+    month i (1 based) of the horizon holds the payments that count grows by: one every 12 //
+    frequency months, or several a month for weekly and biweekly payers. The j-th projected
+    payment is last_dividend * (1 + growth)^j per share. Returns the month dates and a holdings x
+    months matrix of projected dividends, zero in months without a payment.
+    """
+
+    shares = np.asarray(shares, dtype=float)[:, None]
+    last_dividend = np.asarray(last_dividend, dtype=float)[:, None]
+    growth = np.asarray(growth, dtype=float)[:, None]
+    frequency = np.asarray(frequency, dtype=int)[:, None]
+    months_since_last = np.asarray(months_since_last, dtype=int)[:, None]
+
+    if start is None:
+        start = pd.Timestamp.today().date()
+    steps = np.arange(1, months + 1)
+    dates = add_months(start, steps)
+
+    # payments projected by the end of every month, the first projected payment is unchanged
+    elapsed = months_since_last + np.arange(0, months + 1)
+    paid = elapsed * frequency // 12
+    paid -= paid[:, :1]
+
+    # sum of the first paid payments, a month gets the difference of its end and its start
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total = np.where(growth == 0, paid, (np.power(1 + growth, paid) - 1) / growth)
+    matrix = shares * last_dividend * np.diff(total, axis=1)
+
+    return dates, matrix
+
+
+def dividend_yields(hist):
+    """Price, dividend and annualized yield (monthly payments assumed) on every ex-date of hist"""
+
+    paid = hist[hist["Dividends"] != 0]
+    yields = pd.DataFrame({"Price": paid["Close"], "Dividend": paid["Dividends"]})
+    yields["Yield"] = ((yields["Dividend"] * 12) / yields["Price"]) * 100
+    return yields
+
+
+def trailing_yield(yields, months=3, today=None):
+    """Average yield of the dividends paid in the last months, the ROD page's T3 Avg. Yield"""
+
+    if today is None:
+        today = pd.Timestamp.now(tz=yields.index.tz)
+    recent = yields[yields.index >= today - pd.DateOffset(months=months)]
+    return recent["Yield"].mean()
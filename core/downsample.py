@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+
+# points a line chart needs to look identical at the width the pages render it, about one per pixel
+CHART_POINTS = 1200
+
+
+def _numeric(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def lttb(x, y, threshold=CHART_POINTS):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets
+
+    The first and last points are always kept. Every bucket in between keeps the point forming
+    the largest triangle with the point kept in the previous bucket and the average of the
+    next bucket, which preserves the visual shape (peaks, drops) of the line.
+    """
+
+    x = _numeric(x)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(int)
+    kept = np.empty(threshold, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        average_x = x[next_start:next_end].mean()
+        average_y = y[next_start:next_end].mean()
+
+        # twice the triangle area, the constant factor does not change the argmax
+        area = np.abs((x[previous] - average_x) * (y[start:end] - y[previous]) - (x[previous] - x[start:end]) * (average_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        kept[bucket + 1] = previous
+
+    return kept
+
+
+def min_max(y, buckets=CHART_POINTS // 2):
+    """Indices of the lowest and highest point of each of buckets equal slices, in order
+
+    Cheaper than LTTB and never drops an extreme, at the cost of up to two points per bucket.
+    """
+
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if 2 * buckets >= n:
+        return np.arange(n)
+
+    bucket = np.minimum(np.arange(n) * buckets // n, buckets - 1)
+
+    # sorted by bucket then value, the first row of each bucket is its minimum and the last its maximum
+    order = np.lexsort((y, bucket))
+    starts = np.searchsorted(bucket[order], np.arange(buckets))
+    ends = np.r_[starts[1:], n] - 1
+    kept = np.unique(np.concatenate([order[starts], order[ends], [0, n - 1]]))
+    return kept
+
+
+def downsample(series, points=CHART_POINTS, method="lttb"):
+    """series reduced to about points rows for plotting, a Series indexed by date or position"""
+
+    if len(series) <= points:
+        return series
+    if method == "minmax":
+        kept = min_max(series.to_numpy(), points // 2)
+    else:
+        x = series.index.to_numpy(dtype="datetime64[ns]") if isinstance(series.index, pd.DatetimeIndex) else np.arange(len(series))
+        kept = lttb(x, series.to_numpy(), points)
+    return series.iloc[kept]
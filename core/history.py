@@ -0,0 +1,174 @@
+import os
+
+import pandas as pd
+
+from core.store import ColumnStore
+
+MARKET_TZ = "America/New_York"
+MARKET_OPEN = pd.Timedelta(hours=9, minutes=30)
+MARKET_CLOSE = pd.Timedelta(hours=16)
+
+# how long a cached history is trusted while the market is open and the last bar is still moving
+INTRADAY_TTL = pd.Timedelta(minutes=15)
+
+# how far back each of the period buttons reaches, "ytd" and "max" are handled in period_start
+PERIOD_OFFSETS = {
+    "5d": pd.DateOffset(days=6),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "5y": pd.DateOffset(years=5),
+}
+
+CACHE_DIR = os.getenv("ROD_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache"))
+
+
+class YFinanceSource:
+    """Fetches daily bars from yfinance"""
+
+    def history(self, symbol, start=None, back_adjust=False, auto_adjust=True):
+        import yfinance as yf
+
+        ticker = yf.Ticker(symbol)
+        if start is None:
+            return ticker.history(period="max", back_adjust=back_adjust, auto_adjust=auto_adjust)
+        return ticker.history(start=start.strftime("%Y-%m-%d"), back_adjust=back_adjust, auto_adjust=auto_adjust)
+
+
+class FixtureSource:
+    """Serves daily bars from <SYMBOL>.csv files in a directory, for running without network access"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.calls = 0
+
+    def history(self, symbol, start=None, back_adjust=False, auto_adjust=True):
+        self.calls += 1
+        hist = pd.read_csv(os.path.join(self.directory, f"{symbol.upper()}.csv"), index_col=0)
+        hist.index = pd.to_datetime(hist.index, utc=True).tz_convert(MARKET_TZ)
+        if start is not None:
+            hist = hist[hist.index.normalize() >= start.normalize()]
+        return hist
+
+
+def period_start(period, now=None):
+    """Returns the first timestamp covered by a yfinance style period, or None for the max period"""
+
+    if now is None:
+        now = pd.Timestamp.now(tz=MARKET_TZ)
+    if period == "max":
+        return None
+    if period == "ytd":
+        return now.normalize().replace(month=1, day=1)
+    if period not in PERIOD_OFFSETS:
+        raise ValueError(f"Unknown period: {period}")
+    return now - PERIOD_OFFSETS[period]
+
+
+def adjustment_mode(back_adjust, auto_adjust):
+    """Names the price adjustment so differently adjusted histories get separate cache entries"""
+
+    if auto_adjust:
+        return "auto"
+    return "back" if back_adjust else "raw"
+
+
+def last_session_close(now):
+    """Returns the most recent weekday market close at or before now (exchange holidays are not modelled)"""
+
+    close = now.normalize() + MARKET_CLOSE
+    while close > now or close.weekday() >= 5:
+        close -= pd.Timedelta(days=1)
+    return close
+
+
+def market_is_open(now):
+    if now.weekday() >= 5:
+        return False
+    return now.normalize() + MARKET_OPEN <= now < now.normalize() + MARKET_CLOSE
+
+
+def is_stale(fetched, now=None):
+    """Decides whether a history fetched at the given time needs refreshing
+
+    While the market is open the last bar changes, so entries older than INTRADAY_TTL are stale.
+    Outside market hours an entry stays fresh until another session has closed after it was fetched.
+    """
+
+    if now is None:
+        now = pd.Timestamp.now(tz=MARKET_TZ)
+    fetched = fetched.tz_convert(MARKET_TZ)
+
+    if market_is_open(now):
+        return now - fetched > INTRADAY_TTL
+    return fetched < last_session_close(now)
+
+
+class HistoryCache:
+    """On disk cache of daily price/dividend histories keyed by symbol and adjustment mode
+
+    A stale entry is refreshed by fetching only the bars from the last cached date onwards and
+    appending them. Adjusted histories are refetched in full when the new bars carry a dividend
+    or split, since those rewrite every earlier adjusted price. Histories live in a ColumnStore,
+    so the frames returned are backed by memory mapped files rather than each process's heap.
+    observer, when set, is called with every frame fetched from the source.
+    """
+
+    def __init__(self, source=None, directory=CACHE_DIR, observer=None):
+        self.source = source if source is not None else YFinanceSource()
+        self.store = ColumnStore(os.path.join(directory, "store"))
+        self.observer = observer
+
+    def _fetch(self, symbol, **kwargs):
+        hist = self.source.history(symbol, **kwargs)
+        if self.observer is not None:
+            self.observer(hist)
+        return hist
+
+    def load(self, symbol, mode):
+        fetched = self.store.fetched(symbol, mode)
+        if fetched is None:
+            return None
+        return {"fetched": fetched, "hist": self.store.read(symbol, mode)}
+
+    def save(self, symbol, mode, entry):
+        self.store.write(symbol, mode, entry["hist"], entry["fetched"])
+
+    def history(self, symbol, back_adjust=False, auto_adjust=True, now=None):
+        """Returns the full daily history for symbol, fetching only what is missing from the cache"""
+
+        if now is None:
+            now = pd.Timestamp.now(tz=MARKET_TZ)
+        mode = adjustment_mode(back_adjust, auto_adjust)
+        entry = self.load(symbol, mode)
+
+        if entry is not None and not is_stale(entry["fetched"], now):
+            return entry["hist"]
+
+        if entry is None or entry["hist"].empty:
+            hist = self._fetch(symbol, back_adjust=back_adjust, auto_adjust=auto_adjust)
+        else:
+            cached = entry["hist"]
+            last_date = cached.index[-1]
+
+            # refetch the last cached day as well, it may have been saved mid session
+            new_bars = self._fetch(symbol, start=last_date.tz_convert(MARKET_TZ).normalize(), back_adjust=back_adjust, auto_adjust=auto_adjust)
+            new_bars = new_bars[new_bars.index >= last_date]
+
+            appended = new_bars[new_bars.index > last_date]
+            corporate_action = any(column in appended and (appended[column] != 0).any() for column in ("Dividends", "Stock Splits"))
+            if mode != "raw" and corporate_action:
+                hist = self._fetch(symbol, back_adjust=back_adjust, auto_adjust=auto_adjust)
+            elif new_bars.empty:
+                hist = cached
+            else:
+                hist = pd.concat([cached[cached.index < last_date], new_bars])
+
+        self.save(symbol, mode, {"fetched": now, "hist": hist})
+
+        # hand out the memory mapped copy so the freshly fetched frame can be freed
+        return self.store.read(symbol, mode)
+
+
+history_cache = HistoryCache()
@@ -0,0 +1,77 @@
+import pandas as pd
+
+
+MARKET_TZ = "America/New_York"
+
+
+class ColumnBuffer:
+    """Collects records column by column and builds one typed DataFrame at the end
+
+    Appending is a list append per column, so ingesting n records is O(n) instead of the O(n^2)
+    of growing a DataFrame with pd.concat. dtypes maps columns to "datetime" (parsed as UTC and
+    shown in market time), "numeric" or any dtype accepted by astype.
+    """
+
+    def __init__(self, columns, dtypes=None):
+        self.columns = {column: [] for column in columns}
+        self.dtypes = dtypes or {}
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()), []))
+
+    def append(self, *values):
+        for values_list, value in zip(self.columns.values(), values):
+            values_list.append(value)
+
+    def frame(self, index=None):
+        data = {}
+        for column, values in self.columns.items():
+            dtype = self.dtypes.get(column)
+            if dtype == "datetime":
+                data[column] = pd.to_datetime(pd.Series(values, dtype=object), utc=True, format="ISO8601").dt.tz_convert(MARKET_TZ)
+            elif dtype == "numeric":
+                data[column] = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce")
+            elif dtype is not None:
+                data[column] = pd.Series(values).astype(dtype)
+            else:
+                data[column] = pd.Series(values)
+
+        frame = pd.DataFrame(data)
+        if index is not None:
+            frame.index = index
+        return frame
+
+
+def numeric_columns(frame):
+    """Converts every column whose values all parse as numbers, Robinhood sends numbers as strings"""
+
+    for column in frame.columns:
+        converted = pd.to_numeric(frame[column], errors="coerce")
+        if converted.notna().sum() == frame[column].notna().sum():
+            frame[column] = converted
+    return frame
+
+
+def holdings_frame(holdings):
+    """Builds the holdings frame, one row per symbol, from r.account.build_holdings()"""
+
+    return numeric_columns(pd.DataFrame.from_dict(holdings, orient="index"))
+
+
+def orders_frame(order_history, symbols):
+    """Flattens stock orders into one row per execution
+
+    symbols holds the ticker of every order, in the same order as order_history. Returns the
+    executions with parsed dates and numeric prices and shares, plus the last instrument URL
+    seen for each symbol.
+    """
+
+    executions = ColumnBuffer(["Date", "Symbol", "Price", "Shares", "Type"], {"Date": "datetime", "Price": "numeric", "Shares": "numeric"})
+    instruments = {}
+    for order, symbol in zip(order_history, symbols):
+        instruments[symbol] = order["instrument"]
+        order_type = order["side"].upper()
+        for execution in order["executions"]:
+            executions.append(execution["timestamp"], symbol, execution["price"], execution["quantity"], order_type)
+
+    return executions.frame(), instruments
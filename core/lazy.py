@@ -0,0 +1,17 @@
+import importlib
+
+
+def lazy_page(module, name):
+    """Page callable that imports module, and with it the page's plotting and data libraries,
+    only when the page is first rendered
+
+    st.navigation only needs a callable per page, so the entry points can list every page without
+    importing any of them. The wrapper takes the page function's name, Streamlit derives the url
+    path from it.
+    """
+
+    def page():
+        return getattr(importlib.import_module(module), name)()
+
+    page.__name__ = page.__qualname__ = name
+    return page
@@ -0,0 +1,275 @@
+import hashlib
+import io
+import math
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.history import CACHE_DIR
+
+
+MARKET_TZ = "America/New_York"
+DATE_FORMAT = "%m-%d-%Y"
+
+
+def read_ledger(path):
+    """Reads the portfolio.csv transaction ledger with parsed, market timezone dates"""
+
+    ledger = pd.read_csv(path)
+    ledger["Date"] = pd.to_datetime(ledger["Date"], format=DATE_FORMAT).dt.tz_localize(MARKET_TZ)
+    return ledger
+
+
+def signed_shares(ledger):
+    """Shares added by each transaction, Buy and Drip add shares and Sell removes them"""
+
+    shares = ledger["Shares"].to_numpy(dtype=float)
+    return np.where(ledger["Type"].str.contains("Sell").to_numpy(), -shares, shares)
+
+
+def shares_held(dates, changes, at):
+    """Shares held just before each of the timestamps in at
+
+    dates and changes are the transactions of one symbol, the running share count is looked up
+    with a binary search so only transactions strictly before each timestamp count.
+    """
+
+    order = np.argsort(dates, kind="stable")
+    held = np.concatenate(([0.0], np.cumsum(np.asarray(changes, dtype=float)[order])))
+    return held[np.searchsorted(np.asarray(dates)[order], np.asarray(at), side="left")]
+
+
+def attribute_dividends(ledger, dividends):
+    """Totals the dividends each symbol paid on the shares held at every ex-date
+
+    dividends maps symbols to their dividend per share series indexed by ex-date.
+    """
+
+    changes = signed_shares(ledger)
+    dates = ledger["Date"].to_numpy(dtype="datetime64[ns]")
+    totals = {}
+    for symbol, positions in ledger.groupby("Ticker").indices.items():
+        divs = dividends.get(symbol)
+        if divs is None or divs.empty:
+            totals[symbol] = 0.0
+            continue
+
+        held = shares_held(dates[positions], changes[positions], divs.index.to_numpy(dtype="datetime64[ns]"))
+        totals[symbol] = float(np.dot(held, divs.to_numpy(dtype=float)))
+
+    return pd.Series(totals, dtype=float)
+
+
+# transactions kept in the snapshot for the purchase history table
+RECENT_ROWS = 200
+
+# bytes just before the high-water mark compared on every refresh, the whole prefix is hashed
+# again (in chunks) after loading, when the file did not grow, and every FULL_CHECK refreshes
+TAIL_BYTES = 64 * 1024
+FULL_CHECK = 100
+CHUNK_BYTES = 1024 * 1024
+
+# seconds between writes of the persisted snapshot while rows keep being appended
+SAVE_INTERVAL = 60
+
+
+class LedgerSnapshot:
+    """Event sourced holdings of a transaction ledger that only folds in appended rows
+
+    The snapshot keeps per symbol share counts, cost and contributions plus the share timeline
+    used for dividend attribution, and remembers how far into the file it has read (the
+    high-water mark). A refresh only parses the bytes after that mark, so the cost of a render
+    no longer grows with the ledger. The bytes just before the mark are compared on every refresh
+    and the whole prefix now and then, so if the file was edited or rewritten rather than appended
+    to, the snapshot is rebuilt from scratch. Snapshots are persisted next to the history cache.
+    """
+
+    def __init__(self, path, directory=CACHE_DIR):
+        self.path = path
+        self.cache_path = os.path.join(directory, "ledger", hashlib.sha1(os.path.abspath(path).encode()).hexdigest() + ".pkl")
+        self._lock = threading.Lock()
+        self._hasher = None
+        self._unchecked = 0
+        self._saved = -math.inf
+        self._reset()
+
+        try:
+            self.__dict__.update(pd.read_pickle(self.cache_path))
+        except (FileNotFoundError, EOFError):
+            pass
+
+    def _reset(self):
+        self.header = None
+        self.offset = 0
+        self.rows = 0
+        self.digest = None
+        self.tail = None
+        self.stat = None
+        self.symbols = {}
+        self.recent = pd.DataFrame()
+
+    def _state(self):
+        return {name: getattr(self, name) for name in ("header", "offset", "rows", "digest", "tail", "stat", "symbols", "recent")}
+
+    def refresh(self):
+        """Folds any rows appended since the last refresh into the snapshot"""
+
+        with self._lock:
+            stat = os.stat(self.path)
+            if self.stat == (stat.st_size, stat.st_mtime_ns):
+                return self
+
+            with open(self.path, "rb") as handle:
+                header = handle.readline()
+
+                # hashing is far cheaper than parsing, an edit near the mark is caught right away
+                # and one further back by the next full check
+                appended = header == self.header and stat.st_size >= self.offset
+                if appended and (self._hasher is None or stat.st_size == self.offset or self._unchecked >= FULL_CHECK):
+                    self._hasher, self._unchecked = self._hash(handle), 0
+                    appended = self._hasher.hexdigest() == self.digest
+                elif appended:
+                    appended = self._tail(handle) == self.tail
+                if not appended:
+                    self._reset()
+                    self.header = header
+                    self.offset = len(header)
+                    self._hasher = hashlib.sha1(header)
+
+                handle.seek(self.offset)
+                data = handle.read()
+                self._hasher.update(data)
+                self.offset += len(data)
+                self.digest = self._hasher.hexdigest()
+                self.tail = self._tail(handle)
+                self._unchecked += 1
+
+            if data.strip():
+                columns = self.header.decode().strip().split(",")
+                rows = pd.read_csv(io.BytesIO(data), names=columns, header=None)
+                rows["Date"] = pd.to_datetime(rows["Date"], format=DATE_FORMAT).dt.tz_localize(MARKET_TZ)
+                self._fold(rows)
+
+            self.stat = (stat.st_size, stat.st_mtime_ns)
+            # the pickle is rewritten whole, so only after changes and not on every append
+            if (data.strip() or not appended) and time.monotonic() - self._saved >= SAVE_INTERVAL:
+                self._save()
+
+        return self
+
+    def _hash(self, handle):
+        hasher = hashlib.sha1()
+        handle.seek(0)
+        remaining = self.offset
+        while remaining > 0:
+            chunk = handle.read(min(CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            remaining -= len(chunk)
+        return hasher
+
+    def _tail(self, handle):
+        start = max(0, self.offset - TAIL_BYTES)
+        handle.seek(start)
+        return hashlib.sha1(handle.read(self.offset - start)).hexdigest()
+
+    def _fold(self, rows):
+        self.rows += len(rows)
+        self.recent = pd.concat([self.recent, rows], ignore_index=True).iloc[-RECENT_ROWS:]
+
+        changes = signed_shares(rows)
+        prices = rows["Price"].to_numpy(dtype=float)
+        shares = rows["Shares"].to_numpy(dtype=float)
+        bought = rows["Type"].to_numpy() != "Sell"
+        buys = rows["Type"].to_numpy() == "Buy"
+        dates = rows["Date"].to_numpy(dtype="datetime64[ns]")
+
+        for symbol, positions in rows.groupby("Ticker").indices.items():
+            state = self.symbols.setdefault(symbol, {
+                "shares": 0.0,
+                "purchased": 0.0,
+                "cost": 0.0,
+                "contributions": 0.0,
+                "dates": np.array([], dtype=dates.dtype),
+                "changes": np.array([]),
+                "held": np.array([]),
+            })
+
+            kept = positions[bought[positions]]
+            state["shares"] += changes[positions].sum()
+            state["purchased"] += shares[kept].sum()
+            state["cost"] += (prices[kept] * shares[kept]).sum()
+            state["contributions"] += (prices[positions] * shares[positions])[buys[positions]].sum()
+
+            # extend the running share count, only a backdated row forces a re-sort of the symbol
+            new_dates = dates[positions]
+            new_changes = changes[positions]
+            order = np.argsort(new_dates, kind="stable")
+            new_dates, new_changes = new_dates[order], new_changes[order]
+            if len(state["dates"]) and new_dates[0] < state["dates"][-1]:
+                all_dates = np.concatenate((state["dates"], new_dates))
+                all_changes = np.concatenate((state["changes"], new_changes))
+                order = np.argsort(all_dates, kind="stable")
+                state["dates"], state["changes"] = all_dates[order], all_changes[order]
+                state["held"] = np.cumsum(state["changes"])
+            else:
+                start = state["held"][-1] if len(state["held"]) else 0.0
+                state["dates"] = np.concatenate((state["dates"], new_dates))
+                state["changes"] = np.concatenate((state["changes"], new_changes))
+                state["held"] = np.concatenate((state["held"], start + np.cumsum(new_changes)))
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        temporary = f"{self.cache_path}.{os.getpid()}"
+        pd.to_pickle(self._state(), temporary)
+        os.replace(temporary, self.cache_path)
+        self._saved = time.monotonic()
+
+    def positions(self):
+        """Current holdings per symbol
+
+        Shares is the net share count, Purchased Shares and Cost cover every Buy and Drip (what
+        the capital gains are measured against) and Contributions only the Buy rows.
+        """
+
+        return pd.DataFrame.from_dict({
+            symbol: {
+                "Shares": state["shares"],
+                "Purchased Shares": state["purchased"],
+                "Cost": state["cost"],
+                "Contributions": state["contributions"],
+            }
+            for symbol, state in self.symbols.items()
+        }, orient="index")
+
+    def attribute_dividends(self, dividends):
+        """Same totals as attribute_dividends, looked up on the snapshot's share timelines"""
+
+        totals = {}
+        for symbol, state in self.symbols.items():
+            divs = dividends.get(symbol)
+            if divs is None or divs.empty:
+                totals[symbol] = 0.0
+                continue
+
+            positions = np.searchsorted(state["dates"], divs.index.to_numpy(dtype="datetime64[ns]"), side="left")
+            held = np.concatenate(([0.0], state["held"]))[positions]
+            totals[symbol] = float(np.dot(held, divs.to_numpy(dtype=float)))
+
+        return pd.Series(totals, dtype=float)
+
+
+_snapshots = {}
+
+
+def ledger_snapshot(path):
+    """Returns the refreshed snapshot of a ledger, shared by every session of this process"""
+
+    key = os.path.abspath(path)
+    if key not in _snapshots:
+        _snapshots[key] = LedgerSnapshot(path)
+    return _snapshots[key].refresh()
@@ -0,0 +1,262 @@
+import functools
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from core.history import history_cache, period_start
+
+
+# how long a finished fetch is reused across reruns and sessions
+DEFAULT_TTL = 300
+
+# seconds each endpoint's results stay fresh, endpoints not listed use DEFAULT_TTL
+TTLS = {
+    "history": 300,
+    "info": 60,
+    "news": 900,
+    "holdings": 60,
+    "portfolio_profile": 60,
+    "orders": 600,
+    "transfers": 3600,
+    "total_dividends": 3600,
+}
+
+# bound on what the shared cache holds before the least recently used entries are evicted
+MAX_ENTRIES = 2048
+MAX_BYTES = 512 * 1024 * 1024
+
+
+class RenderStats:
+    """Counts what one page render asked the data layer for and times its stages
+
+    misses are the requests the cache had to fetch for, upstream (per endpoint in endpoints) the
+    ones of them that went to the network; a history already on disk is a miss but not upstream.
+    bytes and received (per endpoint) are the in-memory size of what the upstream fetches
+    returned, spans the (name, seconds) of every timed stage in the order they finished.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.started = time.time()
+        self.seconds = None
+        self.requests = 0
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.upstream = 0
+        self.bytes = 0
+        self.endpoints = {}
+        self.received = {}
+        self.spans = []
+
+    def as_dict(self):
+        return {
+            "page": self.page,
+            "timestamp": self.started,
+            "seconds": self.seconds,
+            "requests": self.requests,
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "upstream": self.upstream,
+            "bytes": self.bytes,
+            "endpoints": dict(self.endpoints),
+            "received": dict(self.received),
+            "spans": [{"name": name, "seconds": seconds} for name, seconds in self.spans],
+        }
+
+
+def _size(value):
+    """Rough in-memory size of a cached value, exact enough to bound the cache"""
+
+    if hasattr(value, "memory_usage"):
+        usage = value.memory_usage(index=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    return sys.getsizeof(value)
+
+
+class RequestCoalescer:
+    """Process wide cache that resolves identical (symbol, endpoint, params) requests to one fetch
+
+    A request for a key that is already being fetched waits on that fetch instead of starting its
+    own, and a finished result is shared by every session until its endpoint's TTL runs out. The
+    least recently used entries are evicted once the cache holds more than max_entries results or
+    max_bytes of them. Counters are kept per page render when the request is made inside render().
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, ttls=TTLS, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.ttl = ttl
+        self.ttls = dict(ttls)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self.entries = OrderedDict()
+        self.inflight = {}
+        self.renders = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def render(self, page):
+        """Collects the counters of every request made in this thread until the block exits"""
+
+        stats = RenderStats(page)
+        start = time.perf_counter()
+        try:
+            with self.bound(stats):
+                yield stats
+        finally:
+            stats.seconds = time.perf_counter() - start
+            self.renders[page] = stats
+
+    @contextmanager
+    def bound(self, stats):
+        """Counts the requests this thread makes under stats, e.g. in a worker of a render"""
+
+        previous = getattr(self._local, "stats", None)
+        self._local.stats = stats
+        try:
+            yield stats
+        finally:
+            self._local.stats = previous
+
+    def current_stats(self):
+        """Returns the counters of the render running in this thread, or empty ones outside a render"""
+
+        return getattr(self._local, "stats", None) or RenderStats(None)
+
+    def get(self, key, fetch, ttl=None, refresh=False, upstream=True):
+        """Returns the cached result for key, calling fetch when there is none
+
+        refresh=True fetches even when a fresh result is cached, the old result keeps being served
+        to other callers until the new one replaces it; a number of seconds only fetches again when
+        the cached result expires within that many seconds. upstream=False is for fetches that may be
+        answered locally and report their network calls themselves through count_upstream().
+        """
+
+        if ttl is None:
+            ttl = self.ttls.get(key[1], self.ttl)
+        stats = getattr(self._local, "stats", None)
+        now = time.monotonic()
+        margin = math.inf if refresh is True else float(refresh or 0)
+
+        with self._lock:
+            if stats is not None:
+                stats.requests += 1
+
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] - now > margin:
+                self.entries.move_to_end(key)
+                if stats is not None:
+                    stats.hits += 1
+                return entry[1]
+
+            future = self.inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.inflight[key] = future
+            elif stats is not None:
+                stats.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = fetch()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(value)
+            size = _size(value)
+            with self._lock:
+                self._store(key, value, time.monotonic() + ttl, size)
+                if stats is not None:
+                    stats.misses += 1
+            if upstream:
+                self.count_upstream(key[1], value, size)
+            return value
+        finally:
+            with self._lock:
+                self.inflight.pop(key, None)
+
+    def count_upstream(self, endpoint, value, size=None):
+        """Counts a network fetch of endpoint under the render running in this thread"""
+
+        stats = getattr(self._local, "stats", None)
+        if stats is None:
+            return
+        size = _size(value) if size is None else size
+        with self._lock:
+            stats.upstream += 1
+            stats.bytes += size
+            stats.endpoints[endpoint] = stats.endpoints.get(endpoint, 0) + 1
+            stats.received[endpoint] = stats.received.get(endpoint, 0) + size
+
+    def _store(self, key, value, expires, size):
+        self._drop(key)
+        self.entries[key] = (expires, value, size)
+        self.bytes += size
+
+        while len(self.entries) > 1 and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+            self._drop(next(iter(self.entries)))
+            self.evictions += 1
+
+    def _drop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def invalidate(self, symbol=None, endpoint=None):
+        """Drops finished results, optionally only those of one symbol and/or endpoint"""
+
+        with self._lock:
+            for key in list(self.entries):
+                if (symbol is None or key[0] == symbol.upper()) and (endpoint is None or key[1] == endpoint):
+                    self._drop(key)
+
+
+coalescer = RequestCoalescer()
+
+# the history cache answers from disk when it can, only what it fetches from its source is upstream
+history_cache.observer = functools.partial(coalescer.count_upstream, "history")
+
+
+def _ticker(symbol):
+    import yfinance as yf
+
+    return yf.Ticker(symbol)
+
+
+def history(symbol, period="max", back_adjust=False, auto_adjust=True, ttl=None, refresh=False):
+    """Daily history for symbol over period, the full history is fetched once and sliced"""
+
+    symbol = symbol.upper()
+    hist = coalescer.get((symbol, "history", (back_adjust, auto_adjust)), lambda: history_cache.history(symbol, back_adjust=back_adjust, auto_adjust=auto_adjust), ttl, refresh, upstream=False)
+
+    # a positional slice is a view, the cached (memory mapped) history is not copied
+    start = period_start(period)
+    return hist if start is None else hist.iloc[hist.index.searchsorted(start):]
+
+
+def dividends(symbol):
+    """Dividend payments for symbol, the same series as yf.Ticker(symbol).dividends"""
+
+    hist = history(symbol)
+    return hist["Dividends"][hist["Dividends"] != 0]
+
+
+def info(symbol, ttl=None, refresh=False):
+    symbol = symbol.upper()
+    return coalescer.get((symbol, "info", ()), lambda: _ticker(symbol).info, ttl, refresh)
+
+
+def news(symbol, ttl=None, refresh=False):
+    symbol = symbol.upper()
+    return coalescer.get((symbol, "news", ()), lambda: _ticker(symbol).news, ttl, refresh)
@@ -0,0 +1,201 @@
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+from core.market import coalescer
+
+
+# renders of every page kept for the latency percentiles and the JSON lines export
+MAX_RENDERS = 1000
+QUANTILES = (0.5, 0.95)
+
+# every finished render is appended to ROD_METRICS_FILE as a JSON line and ROD_PROMETHEUS_FILE is
+# rewritten in the Prometheus text format, e.g. for node_exporter's textfile collector
+METRICS_FILE = os.getenv("ROD_METRICS_FILE")
+PROMETHEUS_FILE = os.getenv("ROD_PROMETHEUS_FILE")
+
+# ROD_DEBUG=1, or ?debug=1 in the url, shows the profile of every render in the sidebar
+DEBUG = os.getenv("ROD_DEBUG", "") not in ("", "0")
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RenderLog:
+    """Timings and data layer counters of the recent renders of every page
+
+    The last size renders of each page are kept for the p50/p95 latencies, the totals since
+    startup for the Prometheus counters.
+    """
+
+    def __init__(self, size=MAX_RENDERS, path=METRICS_FILE, prometheus_path=PROMETHEUS_FILE):
+        self.size = size
+        self.path = path
+        self.prometheus_path = prometheus_path
+        self.renders = {}
+        self.totals = {}
+        self._lock = threading.Lock()
+
+    def record(self, stats):
+        """Adds a finished render, appending it to the JSON lines file and rewriting the Prometheus file"""
+
+        record = stats.as_dict()
+        with self._lock:
+            self.renders.setdefault(record["page"], deque(maxlen=self.size)).append(record)
+
+            totals = self.totals.setdefault(record["page"], {"renders": 0, "seconds": 0.0, "hits": 0, "coalesced": 0, "misses": 0, "upstream": 0, "endpoints": {}, "received": {}, "spans": {}})
+            totals["renders"] += 1
+            totals["seconds"] += record["seconds"]
+            for key in ("hits", "coalesced", "misses", "upstream"):
+                totals[key] += record[key]
+            for key in ("endpoints", "received"):
+                for endpoint, value in record[key].items():
+                    totals[key][endpoint] = totals[key].get(endpoint, 0) + value
+            for span in record["spans"]:
+                count, seconds = totals["spans"].get(span["name"], (0, 0.0))
+                totals["spans"][span["name"]] = (count + 1, seconds + span["seconds"])
+
+            if self.path:
+                with open(self.path, "a") as handle:
+                    handle.write(json.dumps(record) + "\n")
+            if self.prometheus_path:
+                # written next to the target and renamed, a scrape never reads half a file
+                directory = os.path.dirname(os.path.abspath(self.prometheus_path))
+                with tempfile.NamedTemporaryFile("w", dir=directory, delete=False) as handle:
+                    handle.write(self._prometheus())
+                os.replace(handle.name, self.prometheus_path)
+
+    def latency(self, page, quantiles=QUANTILES):
+        """Render time quantiles of the recent renders of page, empty before its first render"""
+
+        with self._lock:
+            seconds = [record["seconds"] for record in self.renders.get(page, ())]
+        if not seconds:
+            return {}
+        return dict(zip(quantiles, np.quantile(seconds, quantiles).tolist()))
+
+    def jsonl(self):
+        """The recent renders of every page as JSON lines, oldest first"""
+
+        with self._lock:
+            records = sorted((record for renders in self.renders.values() for record in renders), key=lambda record: record["timestamp"])
+        return "".join(json.dumps(record) + "\n" for record in records)
+
+    def prometheus(self):
+        """Render latency quantiles and request, byte and stage totals in the Prometheus text format"""
+
+        with self._lock:
+            return self._prometheus()
+
+    def _prometheus(self):
+        lines = [
+            "# HELP rod_render_seconds Page render time, quantiles over the recent renders",
+            "# TYPE rod_render_seconds summary",
+        ]
+        for page, totals in self.totals.items():
+            seconds = [record["seconds"] for record in self.renders[page]]
+            for quantile, value in zip(QUANTILES, np.quantile(seconds, QUANTILES)):
+                lines.append(f'rod_render_seconds{{page="{_label(page)}",quantile="{quantile}"}} {value:.6f}')
+            lines.append(f'rod_render_seconds_sum{{page="{_label(page)}"}} {totals["seconds"]:.6f}')
+            lines.append(f'rod_render_seconds_count{{page="{_label(page)}"}} {totals["renders"]}')
+
+        lines += ["# HELP rod_span_seconds Time spent in each stage of a page render", "# TYPE rod_span_seconds summary"]
+        for page, totals in self.totals.items():
+            for name, (count, seconds) in totals["spans"].items():
+                labels = f'page="{_label(page)}",span="{_label(name)}"'
+                lines.append(f"rod_span_seconds_sum{{{labels}}} {seconds:.6f}")
+                lines.append(f"rod_span_seconds_count{{{labels}}} {count}")
+
+        lines += ["# HELP rod_data_requests_total Data layer requests of page renders by outcome", "# TYPE rod_data_requests_total counter"]
+        for page, totals in self.totals.items():
+            for outcome in ("hits", "coalesced", "misses"):
+                lines.append(f'rod_data_requests_total{{page="{_label(page)}",outcome="{outcome}"}} {totals[outcome]}')
+
+        lines += ["# HELP rod_upstream_calls_total Upstream fetches of page renders by endpoint", "# TYPE rod_upstream_calls_total counter"]
+        for page, totals in self.totals.items():
+            for endpoint, count in totals["endpoints"].items():
+                lines.append(f'rod_upstream_calls_total{{page="{_label(page)}",endpoint="{_label(endpoint)}"}} {count}')
+
+        lines += ["# HELP rod_upstream_bytes_total In-memory size of what the upstream fetches returned", "# TYPE rod_upstream_bytes_total counter"]
+        for page, totals in self.totals.items():
+            for endpoint, size in totals["received"].items():
+                lines.append(f'rod_upstream_bytes_total{{page="{_label(page)}",endpoint="{_label(endpoint)}"}} {size}')
+
+        return "\n".join(lines) + "\n"
+
+
+render_log = RenderLog()
+
+
+@contextmanager
+def span(name):
+    """Times the block as a stage of the render running in this thread, outside a render it only runs it"""
+
+    stats = coalescer.current_stats()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.spans.append((name, time.perf_counter() - start))
+
+
+def debug_enabled():
+    import streamlit as st
+
+    return DEBUG or st.query_params.get("debug", "") not in ("", "0")
+
+
+def debug_sidebar(stats, log=render_log):
+    """Draws the stage timings and data requests of a render, and the exports, in the sidebar"""
+
+    import pandas as pd
+    import streamlit as st
+
+    with st.sidebar.expander("Render Profile", expanded=True):
+        latency = log.latency(stats.page)
+        st.metric("Render Time", f"{stats.seconds * 1000:.0f} ms")
+        st.caption(f"p50 {latency[0.5] * 1000:.0f} ms, p95 {latency[0.95] * 1000:.0f} ms over the last {len(log.renders[stats.page])} renders")
+
+        spans = pd.DataFrame(stats.spans, columns=["Stage", "Seconds"])
+        st.dataframe(spans.assign(ms=(spans["Seconds"] * 1000).round(1)).drop(columns="Seconds"), hide_index=True, use_container_width=True)
+
+        st.caption(f"{stats.upstream} upstream calls, {stats.bytes / 2 ** 20:.2f} MB received, {stats.hits} cached, {stats.coalesced} coalesced, {stats.misses} cache misses")
+        if stats.endpoints:
+            endpoints = pd.DataFrame({"Calls": stats.endpoints, "KB": {endpoint: round(size / 1024, 1) for endpoint, size in stats.received.items()}})
+            st.dataframe(endpoints.rename_axis("Endpoint"), use_container_width=True)
+
+        col1, col2 = st.columns(2)
+        col1.download_button("JSON Lines", log.jsonl(), file_name="renders.jsonl", mime="application/jsonl")
+        col2.download_button("Prometheus", log.prometheus(), file_name="metrics.prom", mime="text/plain")
+
+
+def tracked(page):
+    """Decorates a page function so its data requests and stage timings are recorded under its name
+
+    The finished render goes to the render log, and to the debug sidebar when it is turned on.
+    """
+
+    def decorator(render):
+        @functools.wraps(render)
+        def wrapper(*args, **kwargs):
+            try:
+                with coalescer.render(page) as stats:
+                    result = render(*args, **kwargs)
+            finally:
+                # renders cut short by st.stop or a rerun are timed as well
+                render_log.record(stats)
+            if debug_enabled():
+                debug_sidebar(stats)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,100 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from core.downsample import downsample
+from core.history import MARKET_TZ, PERIOD_OFFSETS, period_start
+
+
+# every period the price chart buttons offer
+PERIODS = [*PERIOD_OFFSETS, "ytd", "max"]
+
+# histories whose period index is kept, one per symbol and adjustment viewed recently
+MAX_INDEXES = 64
+
+
+class PeriodIndex:
+    """Row ranges and price summaries of every chart period of one history
+
+    Each period is resolved to a row range with one binary search over the sorted index when the
+    index is built. Every period ends at the last bar, so the lowest and highest close from any
+    row onwards come from one reversed running min/max, and the summary of any period is a few
+    array lookups. Slices are positional views of the history, nothing is copied.
+    """
+
+    def __init__(self, hist, now=None, column="Close"):
+        if now is None:
+            now = pd.Timestamp.now(tz=MARKET_TZ)
+        self.hist = hist
+        self.column = column
+
+        rows = len(hist)
+        self.bounds = {}
+        for period in PERIODS:
+            start = period_start(period, now)
+            first = 0 if start is None else int(hist.index.searchsorted(start))
+            # a period without bars (e.g. 5D after a long halt) still shows the last one
+            self.bounds[period] = (min(first, max(rows - 1, 0)), rows)
+
+        close = hist[column].to_numpy(dtype=float)
+        self.close = close
+        self.low = np.minimum.accumulate(close[::-1])[::-1]
+        self.high = np.maximum.accumulate(close[::-1])[::-1]
+        self._lines = {}
+
+    def slice(self, period):
+        first, last = self.bounds[period]
+        return self.hist.iloc[first:last]
+
+    def summary(self, period):
+        """First and last close, raw and percent change, lowest and highest close of a period"""
+
+        first, _ = self.bounds[period]
+        start, end = self.close[first], self.close[-1]
+        return {
+            "first": start,
+            "last": end,
+            "change": end - start,
+            "percent": (end - start) / start * 100,
+            "low": self.low[first],
+            "high": self.high[first],
+        }
+
+    def line(self, period):
+        """The period's closes downsampled for the chart, computed once per period"""
+
+        if period not in self._lines:
+            self._lines[period] = downsample(self.slice(period)[self.column])
+        return self._lines[period]
+
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+def period_index(key, hist, now=None):
+    """The PeriodIndex of hist, reused across reruns until the history or the day changes
+
+    key names the history, e.g. the symbol and its adjustment. The last bar is part of the
+    version since it keeps moving while the market is open.
+    """
+
+    if now is None:
+        now = pd.Timestamp.now(tz=MARKET_TZ)
+    last_bar = (hist.index[-1], hist["Close"].iloc[-1]) if len(hist) else None
+    version = (key, len(hist), last_bar, now.date())
+
+    with _lock:
+        index = _indexes.get(version)
+        if index is not None:
+            _indexes.move_to_end(version)
+            return index
+
+    index = PeriodIndex(hist, now)
+    with _lock:
+        _indexes[version] = index
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
@@ -0,0 +1,118 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+logger = logging.getLogger(__name__)
+
+# seconds between refreshes while the market is open and while it is closed
+OPEN_INTERVAL = 60
+CLOSED_INTERVAL = 30 * 60
+MAX_WORKERS = 8
+
+# (back_adjust, auto_adjust) histories the pages read, the ROD page charts the back adjusted one
+HISTORY_MODES = [(False, True), (True, False)]
+
+
+class Prefetcher:
+    """Background thread that keeps the shared cache warm for a set of symbols
+
+    Every cycle refreshes the history and quote of each symbol returned by the symbol sources
+    (callables, so the watchlist and holdings are re-read each time) and runs the extra jobs, e.g.
+    the account data. Only the entries that would expire before the next cycle are fetched again,
+    each endpoint keeps its own TTL, so page renders find them warm and never wait on yfinance or
+    Robinhood themselves. The cadence follows market
+    hours and backs off while the market is closed. The data libraries are imported by the thread
+    itself, so starting it costs the entry point nothing.
+    """
+
+    def __init__(self, sources=(), jobs=(), open_interval=OPEN_INTERVAL, closed_interval=CLOSED_INTERVAL, max_workers=MAX_WORKERS):
+        self.sources = list(sources)
+        self.jobs = list(jobs)
+        self.open_interval = open_interval
+        self.closed_interval = closed_interval
+        self.max_workers = max_workers
+        self.cycles = 0
+        self.errors = 0
+        self.last_cycle = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def symbols(self):
+        symbols = {}
+        for source in self.sources:
+            try:
+                symbols.update(dict.fromkeys(symbol.upper() for symbol in source()))
+            except Exception:
+                self.errors += 1
+                logger.exception("Prefetch symbol source failed")
+        return list(symbols)
+
+    def interval(self, now=None):
+        import pandas as pd
+
+        from core.history import MARKET_TZ, market_is_open
+
+        if now is None:
+            now = pd.Timestamp.now(tz=MARKET_TZ)
+        return self.open_interval if market_is_open(now) else self.closed_interval
+
+    def _refresh_symbol(self, symbol, interval):
+        from core import market
+
+        try:
+            for back_adjust, auto_adjust in HISTORY_MODES:
+                market.history(symbol, back_adjust=back_adjust, auto_adjust=auto_adjust, refresh=interval)
+            market.info(symbol, refresh=interval)
+        except Exception:
+            self.errors += 1
+            logger.exception("Prefetch of %s failed", symbol)
+
+    def run_once(self, interval=None):
+        """Refreshes every symbol and job once, skipping the entries that stay fresh past the next cycle"""
+
+        interval = interval or self.interval()
+        symbols = self.symbols()
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(symbols)))) as pool:
+            list(pool.map(lambda symbol: self._refresh_symbol(symbol, interval), symbols))
+
+        for job in self.jobs:
+            try:
+                job(refresh=interval)
+            except Exception:
+                self.errors += 1
+                logger.exception("Prefetch job failed")
+
+        self.cycles += 1
+        self.last_cycle = time.time()
+
+    def _run(self):
+        while not self._stop.is_set():
+            interval = self.interval()
+            self.run_once(interval)
+            self._stop.wait(interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="prefetcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+_prefetcher = None
+_lock = threading.Lock()
+
+
+def start_prefetcher(sources=(), jobs=()):
+    """Starts the server's prefetcher on the first call, later calls (every rerun) return it"""
+
+    global _prefetcher
+    with _lock:
+        if _prefetcher is None:
+            _prefetcher = Prefetcher(sources, jobs).start()
+        return _prefetcher
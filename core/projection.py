@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+
+# the federal brackets offered by the tax rate select box on the ROD page
+TAX_BRACKETS = [10, 12, 22, 24, 32, 35, 37]
+
+COLUMNS = [
+    "Capital",
+    "Total Contributions",
+    "Weekly Income",
+    "Monthly Income",
+    "Annual Income",
+    "Capital Appreciation",
+    "Taxes",
+    "Total Monthly Income",
+]
+
+
+def project_income(months, average_yield, starting_investment, monthly_investment, capital_appreciation_percent, tax_rate, expense_ratio, columns=COLUMNS):
+    """Computes the whole monthly income schedule as numpy arrays
+
+    Every month the capital grows by the untaxed dividends plus the appreciation and the
+    monthly contribution, so capital follows c[i] = c[i - 1] * growth + monthly_investment.
+    That recurrence has the closed form c[i] = start * growth^i + monthly * sum(growth^k, k < i)
+    which is evaluated here with a single power and cumulative sum instead of a python loop.
+
+    The parameters may be numpy arrays of a common shape, every returned column then has that
+    shape with a trailing months axis. Only the requested columns are computed.
+    """
+
+    steps = np.arange(months)
+
+    # add a trailing axis so array parameters broadcast against the months
+    average_yield = np.asarray(average_yield, dtype=float)[..., None]
+    starting_investment = np.asarray(starting_investment, dtype=float)[..., None]
+    monthly_investment = np.asarray(monthly_investment, dtype=float)[..., None]
+    capital_appreciation_percent = np.asarray(capital_appreciation_percent, dtype=float)[..., None]
+    tax_rate = np.asarray(tax_rate, dtype=float)[..., None]
+    expense_ratio = np.asarray(expense_ratio, dtype=float)[..., None]
+
+    monthly_yield = average_yield / 100 / 12
+    capital_gains_loss = (capital_appreciation_percent - (expense_ratio * 100)) / 12
+    growth = 1 + monthly_yield + capital_gains_loss / 100 - monthly_yield * tax_rate / 100
+
+    # growth^i for every month, and the running geometric sum of the contributions
+    powers = np.power(growth, steps)
+    geometric_sum = np.zeros_like(powers)
+    np.cumsum(powers[..., :-1], axis=-1, out=geometric_sum[..., 1:])
+
+    capital = starting_investment * powers + monthly_investment * geometric_sum
+    del powers, geometric_sum
+
+    annual_income = capital * average_yield / 100
+    monthly_income = annual_income / 12
+    taxes = -1 * (monthly_income * tax_rate / 100)
+
+    schedule = {}
+    for column in columns:
+        if column == "Capital":
+            schedule[column] = capital
+        elif column == "Total Contributions":
+            schedule[column] = np.broadcast_to(starting_investment + monthly_investment * steps, capital.shape)
+        elif column == "Weekly Income":
+            schedule[column] = annual_income / 52
+        elif column == "Monthly Income":
+            schedule[column] = monthly_income
+        elif column == "Annual Income":
+            schedule[column] = annual_income
+        elif column == "Capital Appreciation":
+            schedule[column] = capital_gains_loss * capital / 100
+        elif column == "Taxes":
+            schedule[column] = taxes
+        elif column == "Total Monthly Income":
+            schedule[column] = monthly_income + taxes
+        else:
+            raise ValueError(f"Unknown projection column: {column}")
+
+    return schedule
+
+
+def month_ends(start, months):
+    """Returns the month end dates for the given number of months, starting with the month of start
+
+    Same dates as pd.date_range(start, periods=months, freq="ME") without the slow offset arithmetic
+    """
+
+    first_month = np.datetime64(start, "M")
+    ends = (first_month + np.arange(1, months + 1)).astype("datetime64[D]") - np.timedelta64(1, "D")
+    return pd.DatetimeIndex(ends.astype("datetime64[ns]"))
+
+
+def add_months(start, months):
+    """Returns start shifted by each of the given month counts, clamped to the end of shorter months
+
+    Same dates as start + pd.DateOffset(months=i) for every i, computed as one array
+    """
+
+    start = pd.Timestamp(start)
+    shifted = np.datetime64(start.date(), "M") + np.asarray(months)
+    first_day = shifted.astype("datetime64[D]")
+    last_day = (shifted + 1).astype("datetime64[D]") - np.timedelta64(1, "D")
+    days = np.minimum(first_day + np.timedelta64(start.day - 1, "D"), last_day)
+    return pd.DatetimeIndex(days.astype("datetime64[ns]"))
+
+
+def calculate_future_income(age_range, average_yield, starting_investment, monthly_investment, capital_appreciation_percent, tax_rate, expense_ratio):
+    """Calculates the monthly income from dividends in the future"""
+
+    months = 12 * (age_range[1] - age_range[0])
+
+    schedule = project_income(months, average_yield, starting_investment, monthly_investment, capital_appreciation_percent, tax_rate, expense_ratio)
+
+    # round the data to 2 decimal places
+    data = {"Date": month_ends(pd.Timestamp.today().date(), months)}
+    for column in COLUMNS:
+        data[column] = np.round(schedule[column], 2)
+
+    return pd.DataFrame(data)
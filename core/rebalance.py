@@ -0,0 +1,67 @@
+import numpy as np
+
+from core import market
+from core.allocation import allocate
+from core.calendar_index import dividend_calendar
+from core.dividends import project_dividends
+
+
+def latest_prices(tickers):
+    """Last close of every ticker, in the same order"""
+
+    return [market.history(ticker).iloc[-1]["Close"] for ticker in tickers]
+
+
+def rebalance_plan(holdings, prices, deposit_amount, min_investment):
+    """Splits a deposit across the holdings so they move towards their target weights
+
+    holdings has the Ticker, Shares and Target Weight % columns of the rebalancer editor and
+    prices the current price of every row. Returns the holdings with their current, target and
+    future values and weights, the additional investment and the shares to buy.
+    """
+
+    edited_df = holdings.copy()
+    edited_df['Price'] = np.asarray(prices, dtype=float)
+
+    # Calculate the current value and weight of each asset
+    edited_df['current_value'] = edited_df['Shares'] * edited_df['Price']
+    total_portfolio_value = edited_df['current_value'].sum()
+    new_total_portfolio_value = total_portfolio_value + deposit_amount
+
+    # Calculate current weights and target values
+    edited_df['current_weight'] = round(edited_df['current_value'] / total_portfolio_value * 100, 3)
+    edited_df['target_value'] = (edited_df['Target Weight %'] / 100) * new_total_portfolio_value
+    edited_df['shortfall'] = np.maximum(0, edited_df['target_value'] - edited_df['current_value'])
+
+    # Split the deposit in whole lots of the minimum investment, proportionally to each shortfall
+    edited_df['additional_investment'] = allocate(edited_df['shortfall'], deposit_amount, min_investment, fallback=edited_df['target_value'])
+
+    # Calculate the future weights
+    edited_df['future_value'] = edited_df['current_value'] + edited_df['additional_investment']
+    edited_df['future_weight'] = round(edited_df['future_value'] / new_total_portfolio_value * 100, 3)
+
+    # Calculate the number of shares to be bought
+    edited_df['shares_to_buy'] = edited_df['additional_investment'] / edited_df['Price']
+
+    return edited_df
+
+
+def buy_orders(plan):
+    """The non zero buy orders of a plan, largest first"""
+
+    orders = plan[['Ticker', 'additional_investment', 'shares_to_buy']].rename(columns={'additional_investment': 'Additional Investment', 'shares_to_buy': 'Shares to Buy'})
+    orders = orders[orders['Additional Investment'] != 0]
+    return orders.sort_values(by='Additional Investment', ascending=False).reset_index(drop=True)
+
+
+def future_dividends(plan, years, today=None):
+    """Projects the dividends of the holdings after the buy orders of plan for the coming years
+
+    Returns the month dates and a holdings x months matrix, see project_dividends.
+    """
+
+    # the last payment, growth and frequency of every holding come from the dividend calendar
+    dividend_calendar.refresh(plan['Ticker'])
+    last_dividends, growths, frequencies, months_since_last = dividend_calendar.projection_inputs(plan['Ticker'], today)
+
+    return project_dividends(plan['Shares'] + plan['shares_to_buy'], last_dividends, growths, frequencies, months_since_last, months=12 * years)
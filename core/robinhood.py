@@ -0,0 +1,209 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import SimpleNamespace
+
+from core.history import CACHE_DIR
+
+
+# instruments kept in memory, a personal account only trades a few dozen
+LRU_SIZE = 1024
+MAX_WORKERS = 8
+
+
+# client used instead of robin_stocks when set, e.g. a StubRobinhood when running offline
+_override = None
+
+
+def use_client(stub):
+    """Routes every account and instrument call to stub, None goes back to robin_stocks"""
+
+    global _override
+    _override = stub
+
+
+# login result of this process, robin_stocks keeps the session itself once logged in
+_session = None
+_login_lock = threading.Lock()
+
+
+def login():
+    """Logs in with RH_USERNAME and RH_PASSWORD on the first call, later calls reuse the session
+
+    Nothing is imported or sent until an account call first needs the client, so starting the
+    app or rendering a market data only page never waits on Robinhood.
+    """
+
+    global _session
+    import robin_stocks.robinhood as r
+
+    with _login_lock:
+        if _session is None:
+            # robin_stocks reuses its pickled session token when it is still valid
+            _session = r.login(os.getenv("RH_USERNAME"), os.getenv("RH_PASSWORD"))
+    return r
+
+
+def client():
+    if _override is not None:
+        return _override
+
+    return login()
+
+
+class InstrumentResolver:
+    """Maps Robinhood instrument URLs to ticker symbols without repeating network lookups
+
+    Lookups go through an in-memory LRU, then a JSON map persisted on disk, and only then to
+    the client. Unknown URLs are resolved concurrently and every instrument is fetched at most
+    once: concurrent requests for the same URL wait on the lookup already in flight.
+    """
+
+    def __init__(self, client=None, directory=CACHE_DIR, maxsize=LRU_SIZE, max_workers=MAX_WORKERS):
+        self.client = client
+        self.path = os.path.join(directory, "instruments.json")
+        self.maxsize = maxsize
+        self.max_workers = max_workers
+        self.lookups = 0
+        self.memory = OrderedDict()
+        self.inflight = {}
+        self._lock = threading.Lock()
+        self._disk = None
+
+    def _load_disk(self):
+        if self._disk is None:
+            try:
+                with open(self.path) as handle:
+                    self._disk = json.load(handle)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._disk = {}
+        return self._disk
+
+    def _save_disk(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary = f"{self.path}.{os.getpid()}"
+        with open(temporary, "w") as handle:
+            json.dump(self._disk, handle, indent=1, sort_keys=True)
+        os.replace(temporary, self.path)
+
+    def _remember(self, url, symbol):
+        self.memory[url] = symbol
+        self.memory.move_to_end(url)
+        while len(self.memory) > self.maxsize:
+            self.memory.popitem(last=False)
+
+    def _cached(self, url):
+        if url in self.memory:
+            self.memory.move_to_end(url)
+            return self.memory[url]
+
+        symbol = self._load_disk().get(url)
+        if symbol is not None:
+            self._remember(url, symbol)
+        return symbol
+
+    def _lookup(self, url, future):
+        try:
+            lookup_client = self.client if self.client is not None else client()
+            symbol = lookup_client.stocks.get_symbol_by_url(url)
+        except BaseException as error:
+            with self._lock:
+                self.inflight.pop(url, None)
+            future.set_exception(error)
+            return
+
+        with self._lock:
+            self.lookups += 1
+            self._remember(url, symbol)
+            self._load_disk()[url] = symbol
+            self.inflight.pop(url, None)
+        future.set_result(symbol)
+
+    def resolve_many(self, urls):
+        """Resolves a list of instrument URLs, returning the symbols in the same order"""
+
+        symbols = {}
+        owned = {}
+        waiting = {}
+        with self._lock:
+            for url in dict.fromkeys(urls):
+                symbol = self._cached(url)
+                if symbol is not None:
+                    symbols[url] = symbol
+                elif url in self.inflight:
+                    waiting[url] = self.inflight[url]
+                else:
+                    owned[url] = self.inflight[url] = Future()
+
+        if owned:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(owned)))) as pool:
+                for url, future in owned.items():
+                    pool.submit(self._lookup, url, future)
+
+            with self._lock:
+                self._save_disk()
+
+        for url, future in {**owned, **waiting}.items():
+            symbols[url] = future.result()
+
+        return [symbols[url] for url in urls]
+
+    def resolve(self, url):
+        return self.resolve_many([url])[0]
+
+
+instrument_resolver = InstrumentResolver()
+
+
+class StubRobinhood:
+    """Offline stand-in for robin_stocks.robinhood serving canned account data
+
+    Only the calls the dashboard makes are provided. Every call is counted in calls, and latency
+    adds a fake round trip to each one.
+    """
+
+    def __init__(self, instruments=None, orders=None, holdings=None, transfers=None, profile=None, total_dividends=0.0, latency=0.0):
+        self.instruments = dict(instruments or {})
+        self.orders = list(orders or [])
+        self.holdings = dict(holdings or {})
+        self.transfers = list(transfers or [])
+        self.profile = dict(profile or {"equity": "0"})
+        self.total_dividends = total_dividends
+        self.latency = latency
+        self.calls = {}
+        self._lock = threading.Lock()
+        self.stocks = SimpleNamespace(get_symbol_by_url=self._get_symbol_by_url)
+        self.account = SimpleNamespace(build_holdings=self._build_holdings, get_unified_transfers=self._get_unified_transfers)
+
+    def _call(self, name):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _get_symbol_by_url(self, url):
+        self._call("get_symbol_by_url")
+        return self.instruments[url]
+
+    def _build_holdings(self, with_dividends=False):
+        self._call("build_holdings")
+        return self.holdings
+
+    def _get_unified_transfers(self):
+        self._call("get_unified_transfers")
+        return self.transfers
+
+    def get_all_stock_orders(self):
+        self._call("get_all_stock_orders")
+        return self.orders
+
+    def load_portfolio_profile(self):
+        self._call("load_portfolio_profile")
+        return self.profile
+
+    def get_total_dividends(self):
+        self._call("get_total_dividends")
+        return self.total_dividends
@@ -0,0 +1,246 @@
+import copy
+import math
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from core.history import MARKET_TZ
+
+
+# payments averaged by the screener's trailing yield
+TRAILING_DIVIDENDS = 3
+
+
+class RollingStats:
+    """Price and dividend statistics of one symbol, updated one bar at a time
+
+    The mean and variance of the closes are kept with Welford's method, so a new bar or a
+    revised last bar (the intraday one) is an O(1) update. Dividends are kept as running sums
+    plus the payments themselves for the trailing yields, and the high the drawdown is measured
+    from is a running max.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.first = None
+        self.last = None
+        self.running_high = -math.inf
+        self.max_drawdown = 0.0
+        self.payments = deque()
+        self.dividend_sum = 0.0
+        self.payment_close_sum = 0.0
+        self._settled = None
+
+    @classmethod
+    def from_history(cls, dates, close, dividends):
+        """Builds the state of a whole history in one vectorized pass instead of bar by bar"""
+
+        stats = cls()
+        dates = np.asarray(dates, dtype="datetime64[ns]")
+        close = np.asarray(close, dtype=float)
+        dividends = np.nan_to_num(np.asarray(dividends, dtype=float))
+        keep = ~np.isnan(close)
+        dates, close, dividends = dates[keep], close[keep], dividends[keep]
+        if not len(close):
+            return stats
+
+        # everything but the last bar is settled, the last one may still be revised
+        stats._load(dates[:-1], close[:-1], dividends[:-1])
+        stats.update(dates[-1], close[-1], dividends[-1])
+        return stats
+
+    def _load(self, dates, close, dividends):
+        if not len(close):
+            return
+
+        self.count = len(close)
+        self.mean = float(close.mean())
+        self.m2 = float(((close - self.mean) ** 2).sum())
+        self.first = (dates[0], float(close[0]))
+        self.last = (dates[-1], float(close[-1]), float(dividends[-1]))
+
+        highs = np.maximum.accumulate(close)
+        self.running_high = float(highs[-1])
+        self.max_drawdown = float(min(0.0, (close / highs - 1).min()))
+
+        paid = dividends > 0
+        self.payments = deque(zip(dates[paid], dividends[paid].tolist(), close[paid].tolist()))
+        self.dividend_sum = float(dividends[paid].sum())
+        self.payment_close_sum = float(close[paid].sum())
+
+    def _add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def _remove(self, value):
+        if self.count <= 1:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        mean = (self.count * self.mean - value) / (self.count - 1)
+        self.m2 -= (value - self.mean) * (value - mean)
+        self.mean = mean
+        self.count -= 1
+
+    def _drop_last(self):
+        _, close, dividend = self.last
+        self._remove(close)
+        if dividend > 0:
+            self.payments.pop()
+            self.dividend_sum -= dividend
+            self.payment_close_sum -= close
+        self.running_high, self.max_drawdown, self.last = self._settled
+
+    def update(self, date, close, dividend=0.0):
+        """Adds the bar of date, or replaces the last bar when it is for the same date"""
+
+        date = np.datetime64(date, "ns")
+        close, dividend = float(close), float(dividend or 0.0)
+        if self.last is not None and date == self.last[0]:
+            self._drop_last()
+        elif self.last is not None and date < self.last[0]:
+            raise ValueError("Bars must be added in date order")
+
+        self._settled = (self.running_high, self.max_drawdown, self.last)
+        self._add(close)
+        if self.first is None:
+            self.first = (date, close)
+        self.last = (date, close, dividend)
+
+        self.running_high = max(self.running_high, close)
+        self.max_drawdown = min(self.max_drawdown, close / self.high - 1)
+
+        if dividend > 0:
+            self.payments.append((date, dividend, close))
+            self.dividend_sum += dividend
+            self.payment_close_sum += close
+
+    def snapshot(self):
+        """Copy of the current state that later updates of this instance leave alone"""
+
+        snapshot = copy.copy(self)
+        snapshot.payments = deque(self.payments)
+        return snapshot
+
+    @property
+    def variance(self):
+        """Population variance of the closes, as np.var"""
+
+        return self.m2 / self.count if self.count else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(max(self.variance, 0.0)) if self.count else math.nan
+
+    @property
+    def first_close(self):
+        return self.first[1] if self.first else math.nan
+
+    @property
+    def last_close(self):
+        return self.last[1] if self.last else math.nan
+
+    @property
+    def high(self):
+        return self.running_high
+
+    @property
+    def drawdown(self):
+        """How far the last close is below the highest close, as a negative fraction"""
+
+        return self.last_close / self.high - 1
+
+    @property
+    def sharpe_ratio(self):
+        """Price change per standard deviation, as the screener's Sharpe Ratio"""
+
+        return (self.last_close - self.first_close) / self.std
+
+    def trailing_yield(self, payments=TRAILING_DIVIDENDS):
+        """Annualized yield of the last payments, as the screener's Dividend Yield"""
+
+        if not self.payments:
+            return math.nan
+        recent = [payment for _, payment in zip(range(payments), reversed(self.payments))]
+        dividends = sum(dividend for _, dividend, _ in recent)
+        close = sum(close for _, _, close in recent) / len(recent)
+        return ((dividends / close * 12) * 100) / payments
+
+    def period_yield(self, months=3, now=None):
+        """Average yield of the payments in the last months, the ROD page's T3 Avg. Yield"""
+
+        if now is None:
+            now = pd.Timestamp.now(tz=MARKET_TZ)
+        start = np.datetime64((now - pd.DateOffset(months=months)).tz_convert("UTC").tz_localize(None), "ns")
+
+        yields = []
+        for date, dividend, close in reversed(self.payments):
+            if date < start:
+                break
+            yields.append(dividend * 12 / close * 100)
+        return sum(yields) / len(yields) if yields else math.nan
+
+    @property
+    def payment_count(self):
+        return len(self.payments)
+
+    @property
+    def average_payout(self):
+        return self.dividend_sum / len(self.payments) if self.payments else math.nan
+
+    @property
+    def average_payment_close(self):
+        """Average close on the ex-dates"""
+
+        return self.payment_close_sum / len(self.payments) if self.payments else math.nan
+
+
+class RollingRegistry:
+    """Keeps the RollingStats of every history seen and brings them up to date incrementally
+
+    Syncing with a history only feeds the bars after the last one seen (and the revised last
+    bar). When a history was rewritten, e.g. back adjusted after a dividend, the stats are
+    rebuilt from it instead.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self._lock = threading.Lock()
+
+    def stats(self, key, hist):
+        """The stats of hist, keyed by key (e.g. symbol and adjustment)
+
+        Returns a snapshot taken under the lock, other sessions keep updating the shared stats.
+        """
+
+        dates = hist.index.to_numpy(dtype="datetime64[ns]")
+        close = hist["Close"].to_numpy(dtype=float)
+        dividends = hist["Dividends"].to_numpy(dtype=float) if "Dividends" in hist else np.zeros(len(hist))
+
+        with self._lock:
+            stats = self.entries.get(key)
+            if stats is None or not self._consistent(stats, dates, close):
+                stats = RollingStats.from_history(dates, close, dividends)
+                self.entries[key] = stats
+            else:
+                for position in range(int(np.searchsorted(dates, stats.last[0])), len(dates)):
+                    if not np.isnan(close[position]):
+                        stats.update(dates[position], close[position], dividends[position])
+
+            return stats.snapshot()
+
+    def _consistent(self, stats, dates, close):
+        # the last settled bar must still be in the history with the same close
+        if stats.last is None or stats._settled is None or stats._settled[2] is None:
+            return False
+        date, settled_close, _ = stats._settled[2]
+        position = int(np.searchsorted(dates, date))
+        return position < len(dates) and dates[position] == date and close[position] == settled_close
+
+
+rolling = RollingRegistry()
@@ -0,0 +1,90 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from core.projection import month_ends, project_income
+
+
+PARAMETERS = [
+    "average_yield",
+    "starting_investment",
+    "monthly_investment",
+    "capital_appreciation_percent",
+    "tax_rate",
+    "expense_ratio",
+]
+
+# rows projected at once, keeps each chunk's temporaries to a few tens of MB
+CHUNK_SIZE = 5_000
+
+
+def scenario_grid(**values):
+    """Builds one row per combination of the given parameter values
+
+    Parameters that are not given are left out, pass every name in PARAMETERS to get a grid
+    that project_scenarios can run. Scalars are treated as a single value.
+    """
+
+    for name in values:
+        if name not in PARAMETERS:
+            raise ValueError(f"Unknown scenario parameter: {name}")
+
+    names = list(values)
+    axes = [np.atleast_1d(np.asarray(values[name], dtype=float)) for name in names]
+    mesh = np.meshgrid(*axes, indexing="ij")
+    return pd.DataFrame({name: axis.ravel() for name, axis in zip(names, mesh)})
+
+
+def _project_chunk(months, params, column):
+    return project_income(months, *params, columns=[column])[column]
+
+
+def project_scenarios(grid, months, column="Total Monthly Income", processes=None, chunk_size=CHUNK_SIZE, dtype=float):
+    """Projects every row of a scenario grid in one vectorized pass
+
+    Returns a scenarios x months array of the requested projection column. The grid is worked
+    through in chunks of chunk_size rows to bound the temporaries, and the chunks are run on a
+    process pool when there is more than one. processes=1 keeps everything in the current process.
+    """
+
+    missing = [name for name in PARAMETERS if name not in grid]
+    if missing:
+        raise ValueError(f"Scenario grid is missing parameters: {', '.join(missing)}")
+
+    params = [grid[name].to_numpy(dtype=float) for name in PARAMETERS]
+    starts = range(0, len(grid), chunk_size)
+    chunk_params = ([param[start:start + chunk_size] for param in params] for start in starts)
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    result = np.empty((len(grid), months), dtype=dtype)
+    if processes <= 1 or len(starts) <= 1:
+        for start, chunk in zip(starts, chunk_params):
+            result[start:start + chunk_size] = _project_chunk(months, chunk, column)
+        return result
+
+    with ProcessPoolExecutor(max_workers=min(processes, len(starts))) as pool:
+        chunks = pool.map(_project_chunk, itertools.repeat(months), chunk_params, itertools.repeat(column))
+        for start, chunk in zip(starts, chunks):
+            result[start:start + chunk_size] = chunk
+
+    return result
+
+
+def scenarios_long(grid, projection, column="Total Monthly Income", start=None):
+    """Flattens a scenarios x months projection into a long frame with one row per scenario and month"""
+
+    scenarios, months = projection.shape
+    if start is None:
+        start = pd.Timestamp.today().date()
+
+    data = {name: np.repeat(grid[name].to_numpy(), months) for name in grid.columns}
+    data["Scenario"] = np.repeat(np.arange(scenarios), months)
+    data["Date"] = np.tile(month_ends(start, months).to_numpy(), scenarios)
+    data[column] = projection.ravel()
+
+    return pd.DataFrame(data)
@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from core.rolling import TRAILING_DIVIDENDS
+
+
+# symbols shown on the Next Investment page when no universe file is configured
+WATCHLIST = [
+    "TSLY", "OARK", "APLY", "NVDY", "AMZY", "FBY", "GOOY", "CONY", "NFLY", "DISO",
+    "MSFO", "XOMO", "JPMO", "AMDY", "PYPY", "SQY", "MRNY", "AIYY", "YMAX", "YMAG",
+    "MSTY", "ULTY", "YBIT", "CRSH", "GDXY", "SNOY", "ABNY",
+]
+
+# text file listing the symbols to screen, separated by commas, whitespace or new lines
+UNIVERSE_FILE = os.getenv("ROD_UNIVERSE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "universe.txt"))
+
+
+
+def parse_symbols(text):
+    """Upper case symbols from free text, # starts a comment, duplicates are dropped"""
+
+    lines = (line.split("#", 1)[0] for line in text.splitlines())
+    symbols = " ".join(lines).replace(",", " ").upper().split()
+    return list(dict.fromkeys(symbols))
+
+
+def universe(path=UNIVERSE_FILE):
+    """The symbols to screen, read from path when it exists and the WATCHLIST otherwise"""
+
+    try:
+        with open(path) as handle:
+            symbols = parse_symbols(handle.read())
+    except FileNotFoundError:
+        return list(WATCHLIST)
+    return symbols or list(WATCHLIST)
+
+
+def screen(panel, symbols, prices=True):
+    """Dividend yield, Sharpe ratio, variance and closing prices of every symbol in a panel
+
+    panel is a (Field, Symbol) panel from build_panel. Every metric is computed for all symbols at
+    once on the dates x symbols arrays of closes and dividends, NaN where a symbol did not trade.
+    The Dividend Yield is the annualized yield of the last TRAILING_DIVIDENDS payments and the
+    Sharpe ratio the price change over the period per standard deviation. Symbols that never paid
+    a dividend in the panel are left out. prices adds each symbol's closes for a sparkline.
+    """
+
+    if panel.empty or not symbols:
+        return pd.DataFrame(columns=["Symbol", "Dividend Yield", "Sharpe Ratio", "Variance"] + (["Close Price"] if prices else []))
+
+    close = panel["Close"].reindex(columns=symbols).to_numpy(dtype=float)
+    dividends = panel["Dividends"].reindex(columns=symbols).to_numpy(dtype=float)
+    traded = ~np.isnan(close)
+    rows = len(close)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.nanstd(close, axis=0)
+        variance = np.nanvar(close, axis=0)
+
+        # first and last close each symbol actually traded at
+        first = close[np.argmax(traded, axis=0), np.arange(len(symbols))]
+        last = close[rows - 1 - np.argmax(traded[::-1], axis=0), np.arange(len(symbols))]
+        sharpe_ratio = (last - first) / std
+
+        # the last payments, counted back from the most recent one
+        paid = traded & (np.nan_to_num(dividends) > 0)
+        from_last = np.cumsum(paid[::-1], axis=0)[::-1]
+        trailing = paid & (from_last <= TRAILING_DIVIDENDS)
+        count = trailing.sum(axis=0)
+        trailing_dividends = np.where(trailing, dividends, 0.0).sum(axis=0)
+        trailing_close = np.where(trailing, close, 0.0).sum(axis=0) / count
+        average_yield = ((trailing_dividends / trailing_close * 12) * 100) / TRAILING_DIVIDENDS
+
+    keep = paid.any(axis=0)
+    table = pd.DataFrame({
+        "Symbol": np.asarray(symbols, dtype=object)[keep],
+        "Dividend Yield": average_yield[keep],
+        "Sharpe Ratio": sharpe_ratio[keep],
+        "Variance": variance[keep],
+    })
+
+    if prices:
+        # only store the price and not the date
+        table["Close Price"] = [close[traded[:, column], column].tolist() for column in np.flatnonzero(keep)]
+    return table
@@ -0,0 +1,171 @@
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from core.projection import month_ends
+
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+# paths simulated at once, a chunk of 2,500 paths over 40 years is ~8MB per array
+CHUNK_SIZE = 2_500
+
+# simulations kept for page reruns, each is a few hundred rows of percentile bands
+MAX_SIMULATIONS = 32
+
+
+def monthly_history(hist):
+    """Turns a daily price/dividend history into monthly price returns and dividend yields
+
+    Returns a frame indexed by month end with "Return" (price change over the month) and
+    "Yield" (dividends paid in the month over the previous month end close), both as fractions.
+    """
+
+    close = hist["Close"].resample("ME").last()
+    dividends = hist["Dividends"].resample("ME").sum() if "Dividends" in hist else close * 0
+
+    monthly = pd.DataFrame({
+        "Return": close.pct_change(),
+        "Yield": dividends / close.shift(1),
+    })
+
+    return monthly.dropna()
+
+
+def fit_parameters(monthly):
+    """Estimates the parametric model from monthly returns and yields"""
+
+    log_returns = np.log1p(monthly["Return"].to_numpy())
+    yields = monthly["Yield"].to_numpy()
+    positive = yields[yields > 0]
+
+    return {
+        "return_mean": float(log_returns.mean()),
+        "return_std": float(log_returns.std()),
+        "yield_mean": float(yields.mean()),
+        "yield_std": float(np.log(positive).std()) if len(positive) > 1 else 0.0,
+    }
+
+
+def _draw(method, source, paths, months, seed):
+    """Draws paths x months arrays of monthly price returns and dividend yields"""
+
+    rng = np.random.default_rng(seed)
+
+    if method == "bootstrap":
+        # resample whole months so a month's return and its dividend stay paired
+        returns, yields = source
+        picks = rng.integers(0, len(returns), size=(paths, months))
+        return returns[picks], yields[picks]
+
+    if method == "parametric":
+        # lognormal price returns, and yields shocked around their mean by a lognormal factor
+        returns = np.expm1(rng.normal(source["return_mean"], source["return_std"], size=(paths, months)))
+        shock = rng.normal(0.0, source["yield_std"], size=(paths, months))
+        yields = source["yield_mean"] * np.exp(shock - source["yield_std"] ** 2 / 2)
+        return returns, yields
+
+    raise ValueError(f"Unknown simulation method: {method}")
+
+
+def _simulate_chunk(method, source, paths, months, seed, starting_investment, monthly_investment, tax_rate, expense_ratio):
+    returns, yields = _draw(method, source, paths, months, seed)
+
+    # each month the capital grows by the price return and the after tax dividends, less fees
+    growth = 1 + returns + yields * (1 - tax_rate / 100) - expense_ratio / 100 / 12
+    np.maximum(growth, 1e-9, out=growth)
+
+    # c[t] = c[t - 1] * growth[t - 1] + monthly_investment, stepped for every path at once
+    # via the cumulative growth p[t]: c[t] = p[t] * (start + monthly * sum(1 / p[k], 1 <= k <= t))
+    cumulative = np.ones((paths, months))
+    np.cumprod(growth[:, :-1], axis=1, out=cumulative[:, 1:])
+    contributions = 1 / cumulative
+    contributions[:, 0] = 0
+    np.cumsum(contributions, axis=1, out=contributions)
+
+    capital = cumulative * (starting_investment + monthly_investment * contributions)
+    income = capital * yields * (1 - tax_rate / 100)
+
+    return capital, income
+
+
+def simulate(hist, age_range, starting_investment, monthly_investment, tax_rate, expense_ratio, paths=10_000, method="bootstrap", parameters=None, percentiles=PERCENTILES, seed=None, processes=1, chunk_size=CHUNK_SIZE):
+    """Simulates the future capital and income over many market paths
+
+    Monthly price returns and dividend yields are either bootstrapped from the months in hist or
+    drawn from a lognormal model fitted to them (or given as parameters). The expense ratio is an
+    annual percentage. Returns a frame of the requested percentiles of capital and after tax
+    monthly income for every future month.
+    """
+
+    months = 12 * (age_range[1] - age_range[0])
+
+    if method == "bootstrap":
+        monthly = monthly_history(hist)
+        if monthly.empty:
+            raise ValueError("Not enough history to bootstrap monthly returns")
+        source = (monthly["Return"].to_numpy(), monthly["Yield"].to_numpy())
+    elif parameters is not None:
+        source = parameters
+    else:
+        source = fit_parameters(monthly_history(hist))
+
+    starts = range(0, paths, chunk_size)
+    sizes = [min(chunk_size, paths - start) for start in starts]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = (starting_investment, monthly_investment, tax_rate, expense_ratio)
+
+    capital = np.empty((paths, months))
+    income = np.empty((paths, months))
+
+    if processes <= 1 or len(sizes) <= 1:
+        chunks = (_simulate_chunk(method, source, size, months, chunk_seed, *args) for size, chunk_seed in zip(sizes, seeds))
+        for start, (chunk_capital, chunk_income) in zip(starts, chunks):
+            capital[start:start + chunk_size] = chunk_capital
+            income[start:start + chunk_size] = chunk_income
+    else:
+        with ProcessPoolExecutor(max_workers=min(processes, os.cpu_count() or 1, len(sizes))) as pool:
+            chunks = pool.map(_simulate_chunk, itertools.repeat(method), itertools.repeat(source), sizes, itertools.repeat(months), seeds, *[itertools.repeat(arg) for arg in args])
+            for start, (chunk_capital, chunk_income) in zip(starts, chunks):
+                capital[start:start + chunk_size] = chunk_capital
+                income[start:start + chunk_size] = chunk_income
+
+    bands = {"Date": month_ends(pd.Timestamp.today().date(), months)}
+    for name, values in (("Capital", capital), ("Total Monthly Income", income)):
+        for percentile, band in zip(percentiles, np.percentile(values, percentiles, axis=0)):
+            bands[f"{name} P{percentile}"] = np.round(band, 2)
+
+    return pd.DataFrame(bands)
+
+
+_simulations = OrderedDict()
+_lock = threading.Lock()
+
+
+def simulation(key, hist, age_range, starting_investment, monthly_investment, tax_rate, expense_ratio, paths=10_000, method="bootstrap"):
+    """simulate() for a page, reused across reruns until the history, the inputs or the day change
+
+    key names the history, e.g. the symbol and its adjustment. The chunks run in the server's own
+    process, each is already vectorized over its paths, so no process pool is started per render.
+    """
+
+    last_bar = (hist.index[-1], hist["Close"].iloc[-1]) if len(hist) else None
+    version = (key, len(hist), last_bar, pd.Timestamp.today().date(), tuple(age_range), starting_investment, monthly_investment, tax_rate, expense_ratio, paths, method)
+
+    with _lock:
+        bands = _simulations.get(version)
+        if bands is not None:
+            _simulations.move_to_end(version)
+            return bands
+
+    bands = simulate(hist, age_range, starting_investment, monthly_investment, tax_rate, expense_ratio, paths=paths, method=method)
+    with _lock:
+        _simulations[version] = bands
+        while len(_simulations) > MAX_SIMULATIONS:
+            _simulations.popitem(last=False)
+    return bands
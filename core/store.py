@@ -0,0 +1,116 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+
+class ColumnStore:
+    """Columnar on disk store of daily histories, one .npy file per column plus a date index
+
+    Every symbol and adjustment mode is kept under <directory>/<SYMBOL>/<mode>/ in versioned
+    directories. A write builds a new version and then atomically swaps the current pointer,
+    so readers never see a half written history. Reads memory map the column files (copy on
+    write), so every process reading the same history shares the page cache instead of holding
+    its own copy, and a date range is sliced with a binary search over the index without
+    touching the rest of the file.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, symbol, mode):
+        return os.path.join(self.directory, symbol.upper(), mode)
+
+    def meta(self, symbol, mode):
+        """The current version's metadata: columns, timezone, rows and fetch time"""
+
+        try:
+            with open(os.path.join(self.path(symbol, mode), "current.json")) as handle:
+                return json.load(handle)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def fetched(self, symbol, mode):
+        meta = self.meta(symbol, mode)
+        return None if meta is None else pd.Timestamp(meta["fetched"])
+
+    def write(self, symbol, mode, hist, fetched):
+        path = self.path(symbol, mode)
+        version = f"{time.time_ns()}-{os.getpid()}"
+        directory = os.path.join(path, version)
+        os.makedirs(directory)
+
+        # dates are stored as UTC nanoseconds, the timezone goes in the metadata
+        index = pd.DatetimeIndex(hist.index)
+        np.save(os.path.join(directory, "index.npy"), index.as_unit("ns").asi8)
+        for position, column in enumerate(hist.columns):
+            np.save(os.path.join(directory, f"{position}.npy"), hist[column].to_numpy())
+
+        meta = {
+            "version": version,
+            "columns": list(hist.columns),
+            "index_name": index.name,
+            "tz": None if index.tz is None else str(index.tz),
+            "rows": len(hist),
+            "fetched": pd.Timestamp(fetched).isoformat(),
+        }
+        temporary = os.path.join(path, f"current.json.{version}")
+        with open(temporary, "w") as handle:
+            json.dump(meta, handle)
+        os.replace(temporary, os.path.join(path, "current.json"))
+
+        # readers that still map an older version keep their files until they close them, versions
+        # newer than this one belong to a concurrent writer
+        for name in os.listdir(path):
+            if not name.startswith("current.json") and int(name.split("-")[0]) < int(version.split("-")[0]):
+                shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+
+    def _index(self, directory, meta):
+        index = pd.DatetimeIndex(np.load(os.path.join(directory, "index.npy")).view("datetime64[ns]"), name=meta["index_name"])
+        return index if meta["tz"] is None else index.tz_localize("UTC").tz_convert(meta["tz"])
+
+    def read(self, symbol, mode, start=None, end=None, columns=None):
+        """The stored history of symbol between start and end (inclusive), None if nothing is stored
+
+        The returned columns are views of the memory mapped files.
+        """
+
+        meta = self.meta(symbol, mode)
+        if meta is None:
+            return None
+
+        try:
+            return self._read(os.path.join(self.path(symbol, mode), meta["version"]), meta, start, end, columns)
+        except FileNotFoundError:
+            # replaced between reading the pointer and opening the files, take the new version
+            meta = self.meta(symbol, mode)
+            return self._read(os.path.join(self.path(symbol, mode), meta["version"]), meta, start, end, columns)
+
+    def _read(self, directory, meta, start, end, columns):
+        index = self._index(directory, meta)
+        first = 0 if start is None else index.searchsorted(start, side="left")
+        last = len(index) if end is None else index.searchsorted(end, side="right")
+
+        data = {}
+        for position, column in enumerate(meta["columns"]):
+            if columns is None or column in columns:
+                data[column] = self._column(os.path.join(directory, f"{position}.npy"), meta)[first:last]
+
+        return pd.DataFrame(data, index=index[first:last], columns=[column for column in meta["columns"] if column in data], copy=False)
+
+    def _column(self, path, meta):
+        # empty files cannot be memory mapped
+        return np.load(path, mmap_mode="c" if meta["rows"] else None)
+
+    def field(self, symbols, mode, column, start=None, end=None):
+        """One column of several symbols side by side, dates x symbols, e.g. every Close"""
+
+        series = {}
+        for symbol in symbols:
+            hist = self.read(symbol, mode, start, end, columns=[column])
+            if hist is not None and column in hist:
+                series[symbol.upper()] = hist[column]
+        return pd.DataFrame(series)
@@ -0,0 +1,56 @@
+import pandas as pd
+
+from core import market
+from core.calendar_index import dividend_calendar
+from core.ledger import ledger_snapshot
+
+
+def holdings_summary(positions, info, dividend_totals):
+    """Value, capital gains and dividends of every holding
+
+    positions comes from LedgerSnapshot.positions(), info maps symbols to their quote and
+    dividend_totals to the dividends their shares received.
+    """
+
+    symbols = positions.index.tolist()
+
+    # calculate percent of portfolio by mulitplying the number of shares by the current price
+    previous_close = pd.Series({symbol: info[symbol]["previousClose"] for symbol in symbols}, dtype=float)
+
+    # calculate total returns for each symbol, measured against every purchased and dripped share
+    last_price = pd.Series({symbol: info[symbol]["regularMarketPreviousClose"] for symbol in symbols}, dtype=float)
+
+    summary = pd.DataFrame({
+        "Ticker": symbols,
+        "Shares": positions["Shares"].to_numpy(),
+        "Value": (positions["Shares"] * previous_close).to_numpy(),
+        "Contributions": positions["Contributions"].to_numpy(),
+        "Capital Gains": (last_price * positions["Purchased Shares"] - positions["Cost"]).to_numpy(),
+    })
+    summary["Total Dividends"] = summary["Ticker"].map(dividend_totals).fillna(0.0)
+    return summary
+
+
+def portfolio_totals(summary):
+    """Portfolio wide totals of a holdings_summary, the same figures as the Portfolio page metrics"""
+
+    total_contributions = summary["Contributions"].sum()
+    total_returns = summary["Capital Gains"].sum() + summary["Total Dividends"].sum()
+    return {
+        "Total Portfolio Value": summary["Value"].sum(),
+        "Total Contributions": total_contributions,
+        "Total Gains": summary["Capital Gains"].sum(),
+        "Total Dividends": summary["Total Dividends"].sum(),
+        "Total Return %": total_returns / total_contributions * 100 if total_contributions else 0.0,
+    }
+
+
+def ledger_summary(path):
+    """Reads a portfolio.csv ledger and fetches what the holdings summary of it needs"""
+
+    ledger = ledger_snapshot(path)
+    positions = ledger.positions()
+    info = {symbol: market.info(symbol) for symbol in positions.index}
+    dividend_calendar.refresh(positions.index)
+    dividend_totals = ledger.attribute_dividends({symbol: dividend_calendar.dividends(symbol) for symbol in positions.index})
+    return holdings_summary(positions, info, dividend_totals)
@@ -1,12 +1,21 @@
 import streamlit as st
-from pages.portfolio import portfolio
-from pages.rod import rod
-from pages.rebalancer import rebalancer
+from core.lazy import lazy_page
+from core.prefetch import start_prefetcher
 
+
+def held_tickers():
+    from core.ledger import ledger_snapshot
+
+    return ledger_snapshot("portfolio.csv").positions().index
+
+
+# keeps the market data of every held ticker warm in the background, started once per server
+start_prefetcher(sources=[held_tickers])
+
+# pages and their plotting and data libraries are imported the first time they are opened
 pg = st.navigation([
-    st.Page(portfolio, title="Portfolio", icon=":material/pie_chart:"),
-    st.Page(rod, title="Retire On Dividends", icon=":material/payments:"),
-    st.Page(rebalancer, title="Rebalancer", icon=":material/autorenew:"),
+    st.Page(lazy_page("pages.portfolio", "portfolio"), title="Portfolio", icon=":material/pie_chart:"),
+    st.Page(lazy_page("pages.rod", "rod"), title="Retire On Dividends", icon=":material/payments:"),
+    st.Page(lazy_page("pages.rebalancer", "rebalancer"), title="Rebalancer", icon=":material/autorenew:"),
     ])
 pg.run()
-
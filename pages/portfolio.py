@@ -1,79 +1,72 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-import yfinance as yf
+from core import market
+from core.calendar_index import dividend_calendar
+from core.charts import stacked_totals
+from core.ledger import DATE_FORMAT, ledger_snapshot
+from core.metrics import span, tracked
+from core.summary import holdings_summary, portfolio_totals
 
 
+@tracked("Portfolio")
 def portfolio():
     st.header("Portfolio", divider="rainbow")
-    portfolio = pd.read_csv("portfolio.csv").sort_values("Date", ascending=False)
+    # only the rows appended since the last render are read, the rest comes from the snapshot
+    with span("read ledger"):
+        ledger = ledger_snapshot("portfolio.csv")
+        positions = ledger.positions()
+    symbols = positions.index.tolist()
 
-    symbols = set(portfolio["Ticker"].tolist())
-
-    tickers = yf.Tickers(" ".join(symbols))
-
-    # calculate percent of portfolio by mulitplying the number of shares by the current price
-    portfolio_values = pd.DataFrame()
+    # fetch the quote of every holding, the dividends come from the calendar index
     symbol_data = {}
-    div_data = {}
     with st.spinner("Fetching data..."):
-        for symbol in symbols:
-            symbol_data[symbol] = tickers.tickers[symbol].info
-            div_data[symbol] = tickers.tickers[symbol].dividends
-            shares = portfolio[portfolio["Ticker"] == symbol]["Shares"].sum()
-            sell = portfolio[portfolio["Ticker"] == symbol]["Type"].str.contains("Sell")
-            sell_shares = portfolio[portfolio["Ticker"] == symbol][sell]["Shares"].sum()
-            shares -= sell_shares
-
-            total_value = shares * symbol_data[symbol]["previousClose"]
-            new_row = pd.DataFrame({"Ticker": [symbol], "Value": [total_value]})
-            portfolio_values = pd.concat([portfolio_values, new_row], ignore_index=True)
-
+        with span("fetch quotes"):
+            for symbol in symbols:
+                symbol_data[symbol] = market.info(symbol)
+        with span("dividend calendar"):
+            dividend_calendar.refresh(symbols)
+    div_data = {symbol: dividend_calendar.dividends(symbol) for symbol in symbols}
 
-    # calculate total returns for each symbol
-    returns = pd.DataFrame()
-    total_contributions = 0
-    for symbol in symbols:
-        capital_gains = 0
-        last_price = symbol_data[symbol]["regularMarketPreviousClose"]
-        for _, row in portfolio[portfolio["Ticker"] == symbol].iterrows():
-            if row["Type"] != "Sell":            
-                capital_gains += (last_price - row["Price"]) * row["Shares"]
-                if row["Type"] == "Buy":
-                    total_contributions += row["Price"] * row["Shares"]
-            
-        new_row = pd.DataFrame({"Ticker": [symbol], "Capital Gains": [capital_gains], "Total Dividends": [0.0]})
-        returns = pd.concat([returns, new_row], ignore_index=True)
-
-    # calculate dividends for each symbol
-    # this is a bit more involved because we need to determine the number of shares before that dividend was paid
-    for symbol in symbols:
-        divs = div_data[symbol]
-        # loop through the divs series 
-        for ddate, div in divs.items():
-            for _, row in portfolio[portfolio["Ticker"] == symbol].iterrows():
-                pdate = pd.to_datetime(row["Date"]).tz_localize('America/New_York')
-                if pdate < ddate:
-                    returns.loc[returns["Ticker"] == symbol, "Total Dividends"] += div * row["Shares"]
-        
-    # calculate total returns
-    total_returns = returns["Capital Gains"].sum() + returns["Total Dividends"].sum()
+    # value, capital gains and the dividends paid on the shares held at every ex-date
+    with span("attribute dividends"):
+        returns = holdings_summary(positions, symbol_data, ledger.attribute_dividends(div_data))
+        totals = portfolio_totals(returns)
     
     
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total Portfolio Value", f"${round(portfolio_values['Value'].sum(), 2)}", f"{round((total_returns / total_contributions) * 100, 2)}%")
+        st.metric("Total Portfolio Value", f"${round(totals['Total Portfolio Value'], 2)}", f"{round(totals['Total Return %'], 2)}%")
     with col2:
-        st.metric("Total Contributions", f"${round(total_contributions, 2)}")
+        st.metric("Total Contributions", f"${round(totals['Total Contributions'], 2)}")
     with col3:
-        st.metric("Total Gains", f"${round(returns["Capital Gains"].sum(), 2)}")
+        st.metric("Total Gains", f"${round(totals['Total Gains'], 2)}")
     with col4:
-        st.metric("Total Dividends", f"${round(returns['Total Dividends'].sum(), 2)}")
+        st.metric("Total Dividends", f"${round(totals['Total Dividends'], 2)}")
 
     # st.table(returns)
 
-    fig = go.Figure(data=[go.Pie(labels=portfolio_values["Ticker"], values=portfolio_values["Value"])])
-    st.plotly_chart(fig)
+    with span("plot holdings"):
+        fig = go.Figure(data=[go.Pie(labels=returns["Ticker"], values=returns["Value"])])
+        st.plotly_chart(fig)
+
+    with st.expander("Upcoming Dividends"):
+        # ex-dates in the coming days across every holding, projected from each payment frequency
+        days = st.number_input("Days Ahead", min_value=1, max_value=365, value=30)
+        with span("upcoming dividends"):
+            upcoming = dividend_calendar.upcoming(days, shares=positions["Shares"].to_dict())
+        st.metric("Expected Dividends", f"${round(upcoming['Amount'].sum(), 2)}")
+
+        # one bar per ex-date, the holdings paying on it listed on hover
+        if not upcoming.empty:
+            with span("plot dividends"):
+                chart = stacked_totals(upcoming["Date"].dt.tz_localize(None).to_numpy(), upcoming["Symbol"], upcoming["Amount"])
+                fig = go.Figure(data=[go.Bar(x=chart['x'], y=chart['y'], text=chart['text'], textposition='outside', hovertext=chart['hovertext'], hoverinfo='none', hovertemplate='%{hovertext}<extra></extra>', marker_color='darkgreen')])
+                fig.update_layout(title='Upcoming Dividends', xaxis_title='Ex-Date', yaxis_title='Dividends', xaxis=dict(tickformat='%Y-%m-%d'))
+                st.plotly_chart(fig)
+
+        st.table(upcoming.assign(Date=upcoming["Date"].dt.strftime(DATE_FORMAT)))
 
     with st.expander("Purchase History"):
-        st.table(portfolio)
\ No newline at end of file
+        history = ledger.recent.sort_values("Date", ascending=False)
+        st.table(history.assign(Date=history["Date"].dt.strftime(DATE_FORMAT)))
\ No newline at end of file
@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# the core package lives in the repo root, and the caches it writes go to a scratch directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ROD_CACHE_DIR", tempfile.mkdtemp(prefix="rod-tests-"))
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from core.allocation import allocate
+
+
+def leftover_loop(shortfall, deposit, lot):
+    """The rebalancer's allocation before allocate(): proportional floors, then one lot at a time"""
+
+    shortfall = np.asarray(shortfall, dtype=float)
+    amounts = shortfall / shortfall.sum() * deposit
+    amounts = np.where(amounts < lot, 0, (amounts // lot) * lot)
+
+    remaining = deposit - amounts.sum()
+    while remaining >= lot:
+        for position in range(len(amounts)):
+            if shortfall[position] > 0 and remaining >= lot:
+                amounts[position] += lot
+                remaining -= lot
+    return amounts
+
+
+def test_matches_the_leftover_loop():
+    assert allocate([35, 40, 25], 100, 10).tolist() == leftover_loop([35, 40, 25], 100, 10).tolist() == [40, 40, 20]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_invariants(seed):
+    rng = np.random.default_rng(seed)
+    shortfall = rng.uniform(0, 1000, 8) * (rng.random(8) > 0.3)
+    deposit, lot = float(rng.integers(1, 2000)), float(rng.choice([1, 5, 10, 25]))
+
+    amounts = allocate(shortfall, deposit, lot)
+
+    assert amounts.sum() <= deposit
+    assert np.allclose(amounts % lot, 0)
+    assert (amounts[shortfall == 0] == 0).all()
+    if shortfall.sum() > 0:
+        # every whole lot of the deposit is invested, the same total as the old loop
+        assert amounts.sum() == leftover_loop(shortfall, deposit, lot).sum() == deposit // lot * lot
+
+
+def test_zero_lot_splits_the_deposit_exactly():
+    assert allocate([30, 10, 0], 100, 0) == pytest.approx([75, 25, 0])
+
+
+def test_nothing_short_falls_back():
+    # every holding is at or above its target, the deposit follows the target values
+    assert allocate([0, 0, 0], 100, 5, fallback=[200, 100, 100]).tolist() == [50, 25, 25]
+    assert allocate([0, 0], 100, 5).tolist() == [0, 0]
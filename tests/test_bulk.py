@@ -0,0 +1,30 @@
+import functools
+
+import pandas as pd
+
+from core.bulk import PanelCache, SyntheticSource, build_panel, fetch_histories
+from core.history import HistoryCache, MARKET_TZ
+from core.market import coalescer
+from core.screener import screen
+
+
+def test_panel_reads_the_period_from_the_store(tmp_path):
+    cache = HistoryCache(SyntheticSource(years=3), directory=tmp_path)
+    symbols = ["AAA", "BBB", "CCC"]
+    now = pd.Timestamp.now(tz=MARKET_TZ)
+
+    panel = PanelCache(cache).panel(symbols, "1y", now)
+    expected = build_panel(fetch_histories(symbols, cache=cache, now=now), pd.Timestamp(now) - pd.DateOffset(years=1))
+
+    assert panel.index.min() >= now - pd.DateOffset(years=1)
+    pd.testing.assert_frame_equal(screen(panel, symbols), screen(expected, symbols))
+
+
+def test_pool_fetches_count_under_the_render(tmp_path):
+    cache = HistoryCache(SyntheticSource(years=1), directory=tmp_path, observer=functools.partial(coalescer.count_upstream, "history"))
+    symbols = ["AAA", "BBB", "CCC"]
+
+    with coalescer.render("Screener") as stats:
+        PanelCache(cache).panel(symbols, "max")
+
+    assert stats.endpoints["history"] == len(symbols)
@@ -0,0 +1,9 @@
+import cli
+
+
+def test_output_options_follow_the_command():
+    args = cli.parser().parse_args(["rebalance", "holdings.csv", "--deposit", "500", "--format", "csv"])
+    assert (args.format, args.output) == ("csv", None)
+
+    args = cli.parser().parse_args(["screener", "--period", "3mo", "--output", "screener.json"])
+    assert (args.format, args.output) == ("json", "screener.json")
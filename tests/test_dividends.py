@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.calendar_index import DividendCalendar
+from core.dividends import MAX_GROWTH, dividend_growth, payment_frequency, project_dividends
+from core.history import MARKET_TZ
+
+
+def payments(days, count=12, start="2024-11-01"):
+    return pd.Series(0.1, index=pd.date_range(start, periods=count, freq=f"{days}D", tz=MARKET_TZ))
+
+
+@pytest.mark.parametrize("days, frequency", [(7, 52), (14, 26), (30, 12), (91, 4)])
+def test_payment_frequency(days, frequency):
+    assert payment_frequency(payments(days)) == frequency
+
+
+def test_weekly_payers_pay_several_times_a_month():
+    _, matrix = project_dividends([1, 1, 1], [1.0, 1.0, 1.0], [0.0, 0.0, 0.0], [52, 26, 4], [0, 0, 2], months=12)
+
+    assert matrix.sum(axis=1).tolist() == [52, 26, 4]
+    assert matrix[0].min() == 4
+    assert matrix[2].tolist() == [1, 0, 0] * 4
+
+
+def test_calendar_projects_weekly_payers_a_week_apart():
+    calendar = DividendCalendar(horizon_months=3)
+    today = pd.Timestamp("2025-03-10", tz=MARKET_TZ)
+    calendar.update("YMAX", payments(7, count=18), today)
+
+    events = calendar.between(today, today + pd.DateOffset(months=3))
+    gaps = np.diff(events["Date"].dt.tz_localize(None).to_numpy()) / np.timedelta64(1, "D")
+
+    assert events["Projected"].all()
+    assert set(gaps) == {7}
+    assert len(events) == 13
+
+
+def test_growth_follows_the_annual_totals():
+    # payouts alternating between 1 and 2 average +25% a payment but pay the same every year
+    alternating = pd.Series([1.0, 2.0] * 18, index=pd.date_range("2022-01-03", periods=36, freq="MS", tz=MARKET_TZ))
+    assert dividend_growth(alternating) == pytest.approx(0.0)
+
+    # a payout that doubles every year is held to the cap
+    doubling = pd.Series(np.repeat([1.0, 2.0, 4.0], 4), index=pd.date_range("2022-01-03", periods=12, freq="QS", tz=MARKET_TZ))
+    assert (1 + dividend_growth(doubling, 4)) ** 4 - 1 == pytest.approx(MAX_GROWTH)
+
+
+def test_growth_needs_two_years_of_payments():
+    assert dividend_growth(payments(30, count=23)) == 0.0
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from core.history import MARKET_TZ, FixtureSource, HistoryCache
+
+
+def write_bars(directory, symbol, days, dividends=None):
+    index = pd.DatetimeIndex(pd.bdate_range("2024-01-02", days[-1]), name="Date").tz_localize(MARKET_TZ)
+    hist = pd.DataFrame({"Close": range(10, 10 + len(index)), "Dividends": 0.0, "Stock Splits": 0.0}, index=index, dtype=float)
+    for day, amount in (dividends or {}).items():
+        hist.loc[pd.Timestamp(day, tz=MARKET_TZ), "Dividends"] = amount
+    hist.to_csv(directory / f"{symbol}.csv")
+    return hist
+
+
+def test_refresh_fetches_only_the_new_bars(tmp_path):
+    fixtures = tmp_path / "fixtures"
+    fixtures.mkdir()
+    source = FixtureSource(fixtures)
+    cache = HistoryCache(source, directory=tmp_path / "cache")
+
+    write_bars(fixtures, "AAA", ["2024-03-04"])
+    first = cache.history("AAA", now=pd.Timestamp("2024-03-04 18:00", tz=MARKET_TZ))
+    assert source.calls == 1
+
+    # fresh until the next session closes
+    cache.history("AAA", now=pd.Timestamp("2024-03-05 09:00", tz=MARKET_TZ))
+    assert source.calls == 1
+
+    expected = write_bars(fixtures, "AAA", ["2024-03-05"])
+    second = cache.history("AAA", now=pd.Timestamp("2024-03-05 18:00", tz=MARKET_TZ))
+    assert source.calls == 2
+    assert len(second) == len(first) + 1
+    assert second["Close"].tolist() == expected["Close"].tolist()
+
+
+def test_new_dividend_refetches_adjusted_history(tmp_path):
+    fixtures = tmp_path / "fixtures"
+    fixtures.mkdir()
+    source = FixtureSource(fixtures)
+    cache = HistoryCache(source, directory=tmp_path / "cache")
+
+    write_bars(fixtures, "AAA", ["2024-03-04"])
+    cache.history("AAA", now=pd.Timestamp("2024-03-04 18:00", tz=MARKET_TZ))
+
+    write_bars(fixtures, "AAA", ["2024-03-05"], dividends={"2024-03-05": 0.5})
+    hist = cache.history("AAA", now=pd.Timestamp("2024-03-05 18:00", tz=MARKET_TZ))
+
+    # the new bars carried a dividend, so the whole adjusted history was fetched again
+    assert source.calls == 3
+    assert hist["Dividends"].iloc[-1] == 0.5
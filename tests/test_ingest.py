@@ -0,0 +1,15 @@
+import pandas as pd
+
+from core.ingest import MARKET_TZ, ColumnBuffer
+
+
+def test_mixed_precision_timestamps():
+    buffer = ColumnBuffer(["Date"], {"Date": "datetime"})
+    buffer.append("2024-03-01T14:30:12.123000Z")
+    buffer.append("2024-03-04T14:30:12Z")
+
+    dates = buffer.frame()["Date"]
+    assert dates.tolist() == [
+        pd.Timestamp("2024-03-01T14:30:12.123", tz="UTC").tz_convert(MARKET_TZ),
+        pd.Timestamp("2024-03-04T14:30:12", tz="UTC").tz_convert(MARKET_TZ),
+    ]
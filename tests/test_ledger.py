@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from core.ledger import LedgerSnapshot, read_ledger
+
+HEADER = "Date,Ticker,Shares,Price,Type\n"
+
+
+def write(path, rows, mode="w"):
+    with open(path, mode) as handle:
+        handle.write((HEADER if mode == "w" else "") + "".join(rows))
+
+
+def test_appended_rows_are_folded_in(tmp_path):
+    path = tmp_path / "portfolio.csv"
+    write(path, ["01-02-2024,AAA,10,5.00,Buy\n"])
+    snapshot = LedgerSnapshot(str(path), directory=tmp_path).refresh()
+
+    write(path, ["01-03-2024,AAA,2,6.00,Drip\n"], mode="a")
+    assert snapshot.refresh().positions().loc["AAA", "Shares"] == 12
+
+
+def test_in_place_edit_rebuilds_the_snapshot(tmp_path):
+    path = tmp_path / "portfolio.csv"
+    later = ["01-03-2024,BBB,4,7.00,Buy\n"] * 50
+    write(path, ["01-02-2024,AAA,10,5.00,Buy\n"] + later)
+    snapshot = LedgerSnapshot(str(path), directory=tmp_path).refresh()
+
+    # a corrected price in an old row, far from the end, the file keeps its length
+    size = os.path.getsize(path)
+    write(path, ["01-02-2024,AAA,10,9.00,Buy\n"] + later)
+    assert os.path.getsize(path) == size
+
+    positions = snapshot.refresh().positions()
+    assert positions.loc["AAA", "Cost"] == pytest.approx(90.0)
+    assert snapshot.rows == len(read_ledger(str(path)))
+
+
+def test_edit_before_an_append_rebuilds_the_snapshot(tmp_path):
+    path = tmp_path / "portfolio.csv"
+    write(path, ["01-02-2024,AAA,10,5.00,Buy\n"])
+    snapshot = LedgerSnapshot(str(path), directory=tmp_path).refresh()
+
+    # the last folded row is corrected and a new one appended, the file grows
+    write(path, ["01-02-2024,AAA,10,6.00,Buy\n", "01-03-2024,AAA,2,6.00,Drip\n"])
+
+    positions = snapshot.refresh().positions()
+    assert positions.loc["AAA", "Cost"] == pytest.approx(72.0)
+    assert snapshot.rows == 2
@@ -0,0 +1,35 @@
+from core import market
+from core.bulk import SyntheticSource
+from core.history import HistoryCache
+from core.market import RequestCoalescer
+
+
+def test_disk_hits_are_not_upstream(tmp_path, monkeypatch):
+    coalescer = RequestCoalescer()
+    cache = HistoryCache(SyntheticSource(years=1), directory=tmp_path)
+    cache.observer = lambda hist: coalescer.count_upstream("history", hist)
+    monkeypatch.setattr(market, "coalescer", coalescer)
+    monkeypatch.setattr(market, "history_cache", cache)
+
+    with coalescer.render("first") as first:
+        market.history("AAA")
+    coalescer.invalidate()
+    with coalescer.render("second") as second:
+        market.history("AAA")
+
+    assert (first.misses, first.upstream, first.endpoints) == (1, 1, {"history": 1})
+    assert first.bytes > 0
+    # the second miss is answered from the on disk cache
+    assert (second.misses, second.upstream, second.endpoints, second.bytes) == (1, 0, {}, 0)
+
+
+def test_refresh_margin_only_refetches_expiring_entries():
+    coalescer = RequestCoalescer(ttls={"orders": 600, "info": 60})
+    calls = []
+
+    for key in (("ACCOUNT", "orders", ()), ("AAA", "info", ())):
+        coalescer.get(key, lambda: None)
+        coalescer.get(key, lambda: calls.append(key[1]), refresh=120)
+
+    # orders stay fresh for longer than the margin, the quote expires within it
+    assert calls == ["info"]
@@ -0,0 +1,45 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.rolling import RollingRegistry, RollingStats
+
+
+def bars(closes, start="2024-01-02"):
+    dates = pd.bdate_range(start, periods=len(closes)).to_numpy(dtype="datetime64[ns]")
+    return dates, np.asarray(closes, dtype=float), np.zeros(len(closes))
+
+
+def assert_same(stats, fresh):
+    for name in ("count", "first_close", "last_close", "high", "drawdown", "max_drawdown", "dividend_sum"):
+        assert getattr(stats, name) == pytest.approx(getattr(fresh, name)), name
+    assert stats.variance == pytest.approx(fresh.variance)
+
+
+def test_revised_last_bar_matches_a_fresh_build():
+    dates, close, dividends = bars([10, 12, 11, 9, 20])
+    stats = RollingStats.from_history(dates, close, dividends)
+
+    # the intraday bar comes down below the earlier high it had replaced
+    stats.update(dates[-1], 8.0)
+    close[-1] = 8.0
+    fresh = RollingStats.from_history(dates, close, dividends)
+
+    assert_same(stats, fresh)
+    assert stats.high == 12
+    assert stats.max_drawdown == pytest.approx(8 / 12 - 1)
+
+
+def test_registry_returns_snapshots():
+    registry = RollingRegistry()
+    dates, close, dividends = bars([10, 12, 11])
+    hist = pd.DataFrame({"Close": close, "Dividends": dividends}, index=pd.DatetimeIndex(dates).tz_localize("UTC"))
+
+    stats = registry.stats("A", hist)
+    registry.stats("A", pd.concat([hist, pd.DataFrame({"Close": [20.0], "Dividends": [0.0]}, index=pd.DatetimeIndex(bars([0] * 4)[0][3:]).tz_localize("UTC"))]))
+
+    assert stats.last_close == 11
+    assert stats.count == 3
+    assert not math.isnan(stats.variance)